@@ -1,51 +1,104 @@
+from typing import TYPE_CHECKING, Optional
+
 import pytest
-from playwright.async_api import async_playwright, Browser, BrowserContext, Page
-import asyncio
+from dotenv import load_dotenv
+from pytest_asyncio import is_async_test
 
+if TYPE_CHECKING:
+    # Plugin modules are imported by pytest_plugins only, so pytest can rewrite their asserts
+    from playwright.async_api import Browser, BrowserContext, Page
+
+    from utils.asset_cache import AssetCache
+    from utils.browser_watchdog import BrowserManager, BrowserWatchdog
+    from utils.emulation import EmulationPlugin, EmulationProfile
+    from utils.network_analyzer import NetworkAnalyzer
+
+
+load_dotenv()
+
+
+pytest_plugins = [
+    "utils.visual_snapshot",
+    "utils.suite_profiler",
+    "utils.stream_reporter",
+    "utils.marketplaces",
+    "utils.impact_selection",
+    "utils.account_pool",
+    "utils.browser_watchdog",
+    "utils.distributed",
+    "utils.network_analyzer",
+    "utils.emulation",
+    "utils.startup",
+    "utils.asset_cache",
+]
 
-@pytest.fixture(scope="session")
-def event_loop():
-    """Create an instance of the default event loop for the test session."""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
+
+def pytest_collection_modifyitems(items):
+    """Run every async test in the session event loop shared with the browser fixture."""
+    session_scope_marker = pytest.mark.asyncio(loop_scope="session")
+    for item in items:
+        if is_async_test(item):
+            item.add_marker(session_scope_marker, append=False)
 
 
 @pytest.fixture(scope="session")
-async def browser():
-    """Create a Playwright browser instance for the test session."""
+async def browser_manager() -> "BrowserManager":
+    """Create the Playwright browser for the test session; the watchdog may relaunch it."""
+    # Imported when a test needs a browser, so collection-only runs skip loading Playwright
+    from playwright.async_api import async_playwright
+
+    from utils.browser_watchdog import BrowserManager
+
     async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=False)  # Set to True for headless mode
-        yield browser
-        await browser.close()
+        manager = BrowserManager(lambda: p.chromium.launch(headless=False))  # Set to True for headless mode
+        await manager.start()
+        yield manager
+        await manager.close()
+
+
+@pytest.fixture
+async def browser(request, browser_manager: "BrowserManager", browser_watchdog: "BrowserWatchdog") -> "Browser":
+    """Current Playwright browser instance, checked by the watchdog before each test."""
+    await browser_watchdog.check(browser_manager, request.node.nodeid)
+    return browser_manager.browser
 
 
 @pytest.fixture
-async def context(browser: Browser) -> BrowserContext:
-    """Create a new browser context for each test."""
-    context = await browser.new_context()
+async def context(request, browser: "Browser", network_analyzer: "NetworkAnalyzer", emulation: "EmulationPlugin",
+                  emulation_profile: Optional["EmulationProfile"], asset_cache: "AssetCache") -> "BrowserContext":
+    """Create a new browser context for each test, with the device settings of its emulation profile."""
+    context = await browser.new_context(
+        **(emulation_profile.context_options() if emulation_profile else {}),
+        **asset_cache.context_options(),
+    )
+    await asset_cache.attach(context)
+    network_analyzer.attach(context, request.node.nodeid)
+    emulation.attach(context, emulation_profile)
     yield context
     await context.close()
 
 
 @pytest.fixture
-async def page(context: BrowserContext) -> Page:
-    """Create a new page for each test."""
+async def page(request, context: "BrowserContext", network_analyzer: "NetworkAnalyzer",
+               emulation: "EmulationPlugin") -> "Page":
+    """Create a new page for each test, throttled by its emulation profile."""
     page = await context.new_page()
+    await network_analyzer.attach_page(context, page, request.node.nodeid)
+    await emulation.apply_page(context, page)
     yield page
     await page.close()
 
 
 @pytest.fixture
-def amazon_url():
+def amazon_url(marketplace_config):
     """Amazon base URL."""
-    return "https://www.amazon.com"
+    return marketplace_config["us"].base_url
 
 
 @pytest.fixture
-def amazon_in_url():
+def amazon_in_url(marketplace_config):
     """Amazon India URL."""
-    return "https://www.amazon.in"
+    return marketplace_config["in"].base_url
 
 
 @pytest.fixture
@@ -27,6 +27,7 @@ class AmazonLoginPage:
     PHONE_NUMBER_FIELD = 'input[name="phoneNumber"]'
     OTP_INPUT = 'input[name="code"]'
     SECURITY_CHECK_CONTAINER = '[data-a-target="auth-status"]'
+    CAPTCHA_INPUT = 'input[name="cvf_captcha_input"], input#auth-captcha-guess'
 
     def __init__(self, page: Page):
         """
@@ -179,6 +180,37 @@ class AmazonLoginPage:
         await self.enter_password(password)
         await self.click_signin_button()
 
+    async def login_with_account(self, lease, timeout: int = 5000) -> bool:
+        """
+        Complete login flow with a leased account and report failed logins to the pool.
+        
+        The login counts against the account's rate limit, and a failed login puts the
+        account into cooldown so other workers don't trigger lockouts or captchas on it.
+        
+        Args:
+            lease: Account lease from the account pool
+            timeout: Timeout in milliseconds for the error or captcha to appear
+            
+        Returns:
+            Boolean indicating if the login was accepted
+        """
+        await lease.record_login()
+        await self.login_with_credentials(lease.email, lease.password)
+        if await self.is_error_message_visible(timeout=timeout) or await self.is_captcha_visible():
+            await lease.report_failure()
+            return False
+        return True
+
+    async def is_captcha_visible(self) -> bool:
+        """
+        Check if a captcha challenge is displayed.
+        
+        Returns:
+            Boolean indicating if a captcha is visible
+        """
+        captcha = self.page.locator(self.CAPTCHA_INPUT)
+        return await captcha.first.is_visible()
+
     async def is_error_message_visible(self, timeout: int = 5000) -> bool:
         """
         Check if error message is displayed.
@@ -0,0 +1,54 @@
+"""
+Test Suite for the Account Pool
+Description: Unit tests of account leasing, login rate limits and cooldowns, using a
+lease state directory private to each test.
+"""
+
+import pytest
+
+from utils.account_pool import Account, AccountPool, AccountPoolTimeout, load_accounts
+
+
+@pytest.fixture
+def pool(tmp_path) -> AccountPool:
+    """Pool with one account allowed two logins per minute."""
+    return AccountPool([Account("user@example.com", "secret", max_logins=2, rate_window=60)],
+                       state_dir=str(tmp_path), cooldown=60)
+
+
+async def test_leases_without_login_are_not_rate_limited(pool):
+    """Test that leasing an account does not count as a login."""
+    for _ in range(5):
+        async with pool.lease(timeout=0.1):
+            pass
+
+
+async def test_rate_limited_account_is_not_leased(pool):
+    """Test that an account reaching max_logins waits for the rate window."""
+    for _ in range(2):
+        async with pool.lease(timeout=0.1) as lease:
+            await lease.record_login()
+    with pytest.raises(AccountPoolTimeout):
+        await pool.acquire(timeout=0.1)
+
+
+async def test_failed_login_cools_account_down(pool):
+    """Test that a reported failure keeps the account from being leased."""
+    lease = await pool.acquire(timeout=0.1)
+    await lease.record_login()
+    await lease.report_failure()
+    with pytest.raises(AccountPoolTimeout):
+        await pool.acquire(timeout=0.1)
+
+
+async def test_fallback_account_does_not_cool_down(tmp_path, monkeypatch):
+    """Test that the single TEST_EMAIL account stays available after a failed login."""
+    for name in ("ACCOUNT_POOL_JSON", "ACCOUNT_POOL_FILE"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("TEST_EMAIL", "placeholder@example.com")
+    pool = AccountPool(load_accounts(), state_dir=str(tmp_path), cooldown=60)
+    lease = await pool.acquire(timeout=0.1)
+    await lease.record_login()
+    await lease.report_failure()
+    async with pool.lease(timeout=0.1) as lease:
+        assert lease.email == "placeholder@example.com"
@@ -8,6 +8,8 @@ Test cases cover email validation, password field visibility, button functionali
 import pytest
 from playwright.async_api import Page, expect
 
+from utils.account_pool import Account
+
 
 class TestAmazonLoginFlow:
     """Test cases for Amazon login functionality."""
@@ -40,48 +42,48 @@ class TestAmazonLoginFlow:
         error_message = page.locator('[role="alert"]')
         await expect(error_message).to_be_visible()
 
-    async def test_password_field_visibility(self, page: Page, amazon_url: str):
+    async def test_password_field_visibility(self, page: Page, amazon_url: str, form_account: Account):
         """Test that password field appears after valid email entry."""
         await page.goto(f"{amazon_url}/ap/signin")
         email_field = page.locator('input[type="email"]')
         continue_button = page.locator('input#continue')
         
         # Enter valid email
-        await email_field.fill("testuser@example.com")
+        await email_field.fill(form_account.email)
         await continue_button.click()
         
         # Wait for password field to appear
         password_field = page.locator('input[type="password"]')
         await expect(password_field).to_be_visible(timeout=5000)
 
-    async def test_password_field_accepts_input(self, page: Page, amazon_url: str):
+    async def test_password_field_accepts_input(self, page: Page, amazon_url: str, form_account: Account):
         """Test that password field accepts input."""
         await page.goto(f"{amazon_url}/ap/signin")
         email_field = page.locator('input[type="email"]')
         continue_button = page.locator('input#continue')
         
         # Enter email
-        await email_field.fill("testuser@example.com")
+        await email_field.fill(form_account.email)
         await continue_button.click()
         
         # Enter password
         password_field = page.locator('input[type="password"]')
         await expect(password_field).to_be_visible(timeout=5000)
-        await password_field.fill("TestPassword123!")
-        await expect(password_field).to_have_value("TestPassword123!")
+        await password_field.fill(form_account.password)
+        await expect(password_field).to_have_value(form_account.password)
 
-    async def test_sign_in_button_visible(self, page: Page, amazon_url: str):
+    async def test_sign_in_button_visible(self, page: Page, amazon_url: str, form_account: Account):
         """Test that Sign-in button is visible on login page."""
         await page.goto(f"{amazon_url}/ap/signin")
         email_field = page.locator('input[type="email"]')
         continue_button = page.locator('input#continue')
         
-        await email_field.fill("testuser@example.com")
+        await email_field.fill(form_account.email)
         await continue_button.click()
         
         password_field = page.locator('input[type="password"]')
         await expect(password_field).to_be_visible(timeout=5000)
-        await password_field.fill("TestPassword123!")
+        await password_field.fill(form_account.password)
         
         signin_button = page.locator('input[type="submit"]')
         await expect(signin_button).to_be_visible()
@@ -0,0 +1,54 @@
+"""
+Test Suite for Amazon Marketplaces
+Work Item ID: 6
+Description: Search and cart checks that run against every configured marketplace
+(amazon.com and amazon.in) concurrently, with marketplace-specific URLs and selectors.
+"""
+
+import re
+
+import pytest
+from playwright.async_api import Page, expect
+
+from utils.marketplaces import Marketplace
+
+
+class TestAmazonMultiMarketplace:
+    """Test cases executed once per marketplace."""
+
+    async def test_homepage_loads(self, marketplaces):
+        """Test that each marketplace homepage loads."""
+        async def body(page: Page, market: Marketplace):
+            await page.goto(market.url())
+            await expect(page.locator(market.selector("search_box"))).to_be_visible()
+
+        await marketplaces.run(body)
+
+    async def test_search_results_display(self, marketplaces):
+        """Test that search results are displayed on each marketplace."""
+        async def body(page: Page, market: Marketplace):
+            await page.goto(market.url())
+            await page.locator(market.selector("search_box")).fill("wireless headphones")
+            await page.locator(market.selector("search_button")).click()
+            await page.wait_for_url("**/s?k=*", timeout=10000)
+            await expect(page.locator(market.selector("search_result")).first).to_be_visible()
+
+        await marketplaces.run(body)
+
+    async def test_prices_use_marketplace_currency(self, marketplaces):
+        """Test that search result prices are shown in the marketplace currency."""
+        async def body(page: Page, market: Marketplace):
+            await page.goto(market.url("search") + "keyboard")
+            price_symbol = page.locator(f'{market.selector("search_result")} .a-price-symbol').first
+            await expect(price_symbol).to_have_text(market.currency_symbol)
+
+        await marketplaces.run(body)
+
+    @pytest.mark.marketplaces("us", "in")
+    async def test_cart_page_loads(self, marketplaces):
+        """Test that the cart page is reachable on each marketplace."""
+        async def body(page: Page, market: Marketplace):
+            await page.goto(market.url("cart"))
+            await expect(page).to_have_url(re.compile(r".*/gp/cart/.*"))
+
+        await marketplaces.run(body)
@@ -0,0 +1,44 @@
+"""
+Test Suite for Amazon Visual Regression
+Work Item ID: 5
+Description: Visual snapshot checks for layout regressions on the sign-in, search results
+and cart pages. Baselines live under snapshots/ and are refreshed with --update-snapshots.
+"""
+
+import pytest
+from playwright.async_api import Page
+
+
+# Regions whose content changes between runs
+PRICE_REGIONS = ['[data-a-color="price"]', '.a-price']
+AD_REGIONS = ['[data-component-type="sp-sponsored-result"]', '.s-widget-container', '#nav-swmslot']
+NAV_REGIONS = ['#nav-global-location-popover-link', '#nav-link-accountList', '#nav-cart-count']
+
+
+@pytest.mark.visual
+class TestAmazonVisualRegression:
+    """Visual snapshot tests for pages visited by the functional suites."""
+
+    async def test_signin_page_layout(self, page: Page, amazon_url: str, assert_snapshot):
+        """Test that the sign-in page layout matches its baseline."""
+        await page.goto(f"{amazon_url}/ap/signin")
+        await page.wait_for_load_state('networkidle')
+        await assert_snapshot(page, "signin")
+
+    async def test_search_results_layout(self, page: Page, amazon_url: str, assert_snapshot):
+        """Test that the search results layout matches its baseline."""
+        await page.goto(f"{amazon_url}/s?k=laptop")
+        await page.wait_for_load_state('networkidle')
+        await assert_snapshot(
+            page,
+            "search_results",
+            mask=PRICE_REGIONS + AD_REGIONS + NAV_REGIONS + ['[data-component-type="s-search-result"] img'],
+            full_page=False,
+            max_diff_ratio=0.05,
+        )
+
+    async def test_cart_page_layout(self, page: Page, amazon_url: str, assert_snapshot):
+        """Test that the cart page layout matches its baseline."""
+        await page.goto(f"{amazon_url}/gp/cart/view.html")
+        await page.wait_for_load_state('networkidle')
+        await assert_snapshot(page, "cart", mask=PRICE_REGIONS + AD_REGIONS + NAV_REGIONS, full_page=False)
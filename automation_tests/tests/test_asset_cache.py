@@ -0,0 +1,62 @@
+"""
+Test Suite for the Shared Asset Cache
+Description: Unit tests of which static asset responses may be shared between browser
+contexts.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from playwright.async_api import Error as PlaywrightError
+
+from utils.asset_cache import AssetCache, AssetStore, is_cacheable
+
+
+@pytest.mark.parametrize("cache_control", ["public, max-age=31536000", "max-age=600", ""])
+def test_public_responses_are_cacheable(cache_control):
+    """Test that successful public responses are cached."""
+    assert is_cacheable(200, {"cache-control": cache_control})
+    assert is_cacheable(200, {"cache-control": cache_control, "vary": "Accept-Encoding"})
+
+
+@pytest.mark.parametrize("cache_control", ["no-store", "no-cache", "private, max-age=600",
+                                           "max-age=0, No-Cache"])
+def test_restricted_responses_are_not_cacheable(cache_control):
+    """Test that private, uncached and always-revalidated responses are not cached."""
+    assert not is_cacheable(200, {"cache-control": cache_control})
+
+
+@pytest.mark.parametrize("status, headers", [
+    (404, {}),
+    (200, {"set-cookie": "session-id=1"}),
+    (200, {"vary": "Accept-Encoding, Cookie"}),
+    (200, {"vary": "Origin"}),
+    (200, {"vary": "Accept"}),
+    (200, {"vary": "*"}),
+])
+def test_cookie_error_and_negotiated_responses_are_not_cacheable(status, headers):
+    """Test that errors and responses tied to cookies or other request headers are not cached."""
+    assert not is_cacheable(status, headers)
+
+
+class FakeRoute:
+    """Route whose fetch fails like a request hitting a DNS or connection error."""
+
+    def __init__(self):
+        self.aborted = False
+
+    async def fetch(self):
+        raise PlaywrightError("net::ERR_NAME_NOT_RESOLVED")
+
+    async def abort(self):
+        self.aborted = True
+
+
+async def test_failed_fetch_aborts_route(tmp_path):
+    """Test that a failed asset download aborts the request instead of leaving it pending."""
+    cache = AssetCache(None, AssetStore(str(tmp_path), max_bytes=1024 * 1024), ttl=60)
+    route = FakeRoute()
+    request = SimpleNamespace(method="GET", url="https://m.media-amazon.com/images/sprite.png")
+    await cache._handle(route, request)
+    assert route.aborted
+    assert cache.failed == 1 and not cache.store.entries
@@ -0,0 +1,91 @@
+"""
+Test Suite for Distributed Execution
+Description: Runs a coordinator and two workers as separate processes over localhost
+against a small throwaway suite, and checks that tests of a killed worker are handed to
+the other worker.
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+
+ROOTDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SUITE = '''
+import os
+
+
+def test_a_kills_worker():
+    if os.environ.get("KILL_WORKER") == "1":
+        os._exit(1)
+
+
+def test_b_prefetched():
+    pass
+
+
+def test_c():
+    pass
+'''
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 30.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"coordinator did not listen on port {port}")
+
+
+def pytest_process(suite_dir, *args, **env) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "pytest", "-p", "no:cacheprovider", "-p", "utils.distributed", *args],
+        cwd=suite_dir,
+        env={**os.environ, "PYTHONPATH": ROOTDIR, **env},
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("max_retries, requeued, killed_outcome", [
+    (0, 1, "ERROR test_suite.py::test_a_kills_worker"),
+    (1, 2, "PASSED test_suite.py::test_a_kills_worker"),
+])
+def test_killed_worker_tests_go_to_other_worker(tmp_path, max_retries, requeued, killed_outcome):
+    """Test that a killed worker's prefetched test always moves on, and its running test only when retries allow."""
+    (tmp_path / "pytest.ini").write_text("[pytest]\n")
+    (tmp_path / "test_suite.py").write_text(SUITE)
+    port = free_port()
+    address = f"127.0.0.1:{port}"
+    coordinator = pytest_process(tmp_path, f"--dist-coordinator={address}", f"--dist-max-retries={max_retries}", "-rA")
+    try:
+        wait_for_port(port)
+        # The first worker prefetches test_b while running test_a, and dies in test_a
+        killed = pytest_process(tmp_path, f"--dist-worker={address}", "--dist-worker-id=killed", KILL_WORKER="1")
+        assert killed.wait(60) == 1
+        survivor = pytest_process(tmp_path, f"--dist-worker={address}", "--dist-worker-id=survivor")
+        assert survivor.wait(60) == 0
+        output, _ = coordinator.communicate(timeout=60)
+    finally:
+        if coordinator.poll() is None:
+            coordinator.kill()
+    assert f"worker killed disconnected (connection closed), {requeued} tests handed to other workers" in output
+    assert killed_outcome in output
+    assert "PASSED test_suite.py::test_b_prefetched" in output
+    assert "PASSED test_suite.py::test_c" in output
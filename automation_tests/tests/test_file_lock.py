@@ -0,0 +1,55 @@
+"""
+Test Suite for the File Lock
+Description: Unit tests of the cross-process lock guarding shared state files.
+"""
+
+import asyncio
+import multiprocessing
+import os
+
+from utils.file_lock import FileLock
+
+
+def hold_and_die(path, held):
+    """Take the lock and exit without releasing it, like a killed worker."""
+    FileLock(path).try_acquire()
+    held.set()
+    os._exit(0)
+
+
+def test_lock_is_exclusive(tmp_path):
+    """Test that a held lock can't be taken through another handle."""
+    path = str(tmp_path / "state.lock")
+    with FileLock(path):
+        assert not FileLock(path).try_acquire()
+    other = FileLock(path)
+    assert other.try_acquire()
+    other.release()
+
+
+def test_lock_of_exited_holder_is_released(tmp_path):
+    """Test that a lock held by a process that exits without releasing it becomes free."""
+    path = str(tmp_path / "state.lock")
+    held = multiprocessing.Event()
+    process = multiprocessing.Process(target=hold_and_die, args=(path, held))
+    process.start()
+    held.wait(10)
+    process.join(10)
+    lock = FileLock(path)
+    assert lock.try_acquire()
+    lock.release()
+
+
+async def test_async_waiters_take_turns(tmp_path):
+    """Test that coroutines waiting on the same lock file hold it one at a time."""
+    path = str(tmp_path / "state.lock")
+    holders = []
+
+    async def worker(name):
+        async with FileLock(path):
+            holders.append(name)
+            await asyncio.sleep(0.02)
+            holders.append(name)
+
+    await asyncio.gather(worker("a"), worker("b"))
+    assert holders in (["a", "a", "b", "b"], ["b", "b", "a", "a"])
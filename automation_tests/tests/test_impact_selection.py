@@ -0,0 +1,143 @@
+"""
+Test Suite for Impact-Based Test Selection
+Description: Unit tests of the dependency index and git diff mapping behind --changed-only,
+run against a throwaway git repository.
+"""
+
+import subprocess
+from types import SimpleNamespace
+
+import pytest
+
+from utils.impact_selection import RUN_ALL, DependencyIndex, base_constants, changed_lines, changed_symbols
+
+
+LOGIN_PAGE = '''
+class AmazonLoginPage:
+    CONTINUE_BUTTON = {selector!r}
+
+    async def click_continue_button(self):
+        await self.page.locator(self.CONTINUE_BUTTON).click()
+'''
+
+LOGIN_TESTS = '''
+class TestAmazonLoginFlow:
+    async def test_continue_inline(self, page):
+        await page.locator('input#continue').click()
+
+    async def test_search(self, page):
+        await page.locator('#twotabsearchtextbox').fill("headphones")
+'''
+
+CONFTEST = '''
+pytest_plugins = ["utils.reporter"]
+'''
+
+REPORTER_PLUGIN = '''
+class Reporter:
+    def pytest_runtest_logreport(self, report):
+        self.last = report.outcome
+
+
+def get_reporter(config):
+    return config.pluginmanager.get_plugin("reporter")
+'''
+
+HELPERS = '''
+class RetryPlugin:
+    def pytest_runtest_setup(self, item):
+        self.attempts = 0
+
+
+def retry_delay(attempt):
+    return 2 ** attempt
+'''
+
+
+def git(rootdir, *args):
+    subprocess.run(["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+                   cwd=rootdir, check=True, capture_output=True)
+
+
+@pytest.fixture
+def suite(tmp_path):
+    """A git repository holding a page object and a test module that inlines its selector."""
+    (tmp_path / "pages").mkdir()
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "utils").mkdir()
+    (tmp_path / "conftest.py").write_text(CONFTEST)
+    (tmp_path / "utils" / "reporter.py").write_text(REPORTER_PLUGIN)
+    (tmp_path / "utils" / "helpers.py").write_text(HELPERS)
+    (tmp_path / "pages" / "amazon_login_page.py").write_text(LOGIN_PAGE.format(selector="input#continue"))
+    (tmp_path / "tests" / "test_amazon_login_flow.py").write_text(LOGIN_TESTS)
+    git(tmp_path, "init", "-q")
+    git(tmp_path, "add", ".")
+    git(tmp_path, "commit", "-q", "-m", "initial")
+    return tmp_path
+
+
+def selected(rootdir):
+    """Names of the tests --changed-only would run for the working tree changes."""
+    root = str(rootdir)
+    changes = changed_lines(root, "HEAD")
+    symbols, _ = changed_symbols(root, changes)
+    index = DependencyIndex(root)
+    index.add_base_constants(base_constants(root, "HEAD", changes))
+    names = []
+    for name in ("test_continue_inline", "test_search"):
+        item = SimpleNamespace(nodeid=f"tests/test_amazon_login_flow.py::TestAmazonLoginFlow::{name}",
+                               fixturenames=["page"])
+        if index.dependencies(item) & symbols:
+            names.append(name)
+    return names
+
+
+def test_changed_selector_selects_tests_inlining_old_value(suite):
+    """Test that changing a selector constant selects tests hard-coding its previous value."""
+    (suite / "pages" / "amazon_login_page.py").write_text(LOGIN_PAGE.format(selector="input#continue-v2"))
+    assert selected(suite) == ["test_continue_inline"]
+
+
+def test_base_constants_skip_unchanged_values(suite):
+    """Test that only constants whose value changed are read from the base revision."""
+    page_path = suite / "pages" / "amazon_login_page.py"
+    page_path.write_text(page_path.read_text() + "\n    # reworded\n")
+    changes = changed_lines(str(suite), "HEAD")
+    assert base_constants(str(suite), "HEAD", changes) == {}
+
+
+def edit(path, old, new):
+    path.write_text(path.read_text().replace(old, new))
+
+
+def changed(rootdir):
+    """Symbols changed in the working tree of a suite."""
+    return changed_symbols(str(rootdir), changed_lines(str(rootdir), "HEAD"))[0]
+
+
+def test_plugin_module_change_runs_all_tests(suite):
+    """Test that editing any code of a module loaded through pytest_plugins runs everything."""
+    edit(suite / "utils" / "reporter.py", "return config", "return  config")
+    assert RUN_ALL in changed(suite)
+
+
+def test_hook_class_change_runs_all_tests(suite):
+    """Test that editing a class defining pytest hooks runs everything, even outside plugin modules."""
+    edit(suite / "utils" / "helpers.py", "self.attempts = 0", "self.attempts = 1")
+    assert RUN_ALL in changed(suite)
+
+
+def test_helper_function_change_is_mapped_to_symbol(suite):
+    """Test that editing a plain helper outside plugin modules selects only its dependents."""
+    edit(suite / "utils" / "helpers.py", "2 ** attempt", "3 ** attempt")
+    assert changed(suite) == {"module:utils/helpers.py", "utils/helpers.py::retry_delay"}
+
+
+def test_untracked_outputs_are_not_changes(suite):
+    """Test that untracked reports and profiles don't count as changes, but new sources do."""
+    (suite / "profile").mkdir()
+    (suite / "profile" / "suite.folded").write_text("test;fixture 10\n")
+    (suite / "results.ndjson").write_text("{}\n")
+    assert changed_lines(str(suite), "HEAD") == {}
+    (suite / "utils" / "waits.py").write_text("TIMEOUT = 5\n")
+    assert changed_lines(str(suite), "HEAD") == {"utils/waits.py": None}
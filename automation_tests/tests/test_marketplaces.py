@@ -0,0 +1,89 @@
+"""
+Test Suite for Marketplace Scheduling
+Description: Unit tests of how the marketplace variants of a test run concurrently while
+each variant reports its own outcome, using fake context pools.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from utils.marketplaces import MarketplaceScheduler
+
+
+class FakePool:
+    """Context pool handing out page-less fake contexts."""
+
+    def __init__(self, code):
+        self.marketplace = SimpleNamespace(code=code)
+
+    async def acquire(self):
+        async def new_page():
+            return None
+
+        return SimpleNamespace(new_page=new_page)
+
+    async def release(self, context):
+        pass
+
+
+class FakeItem:
+    """Marketplace variant of a collected test."""
+
+    def __init__(self, session, name, code):
+        self.session = session
+        self.parent = SimpleNamespace(nodeid="tests/test_markets.py::TestMarkets")
+        self.originalname = name
+        self.callspec = SimpleNamespace(params={"marketplaces": code})
+
+
+@pytest.fixture
+def variants():
+    """Scheduler with two marketplaces and the us and in variants of one test."""
+    session = SimpleNamespace(items=[])
+    session.items = [FakeItem(session, "test_cart", "us"), FakeItem(session, "test_cart", "in")]
+    return MarketplaceScheduler({"us": FakePool("us"), "in": FakePool("in")}), session.items
+
+
+async def test_first_variant_runs_all_marketplaces_concurrently(variants):
+    """Test that the first variant starts the body on every marketplace at once."""
+    scheduler, (us_item, in_item) = variants
+    started, both_started = [], asyncio.Event()
+
+    async def body(page, market):
+        started.append(market.code)
+        if len(started) == 2:
+            both_started.set()
+        await asyncio.wait_for(both_started.wait(), 1)
+
+    await scheduler.run(us_item, "us", body)
+    assert sorted(started) == ["in", "us"]
+    await scheduler.run(in_item, "in", body)
+    assert len(started) == 2
+
+
+async def test_each_variant_reports_its_own_outcome(variants):
+    """Test that a failure on one marketplace fails only that marketplace's variant."""
+    scheduler, (us_item, in_item) = variants
+
+    async def body(page, market):
+        assert market.code != "in", "price missing on amazon.in"
+
+    await scheduler.run(us_item, "us", body)
+    with pytest.raises(AssertionError, match="amazon.in"):
+        await scheduler.run(in_item, "in", body)
+
+
+async def test_unrun_variants_are_cancelled_on_close(variants):
+    """Test that bodies started for variants that never ran are stopped at session end."""
+    scheduler, (us_item, _) = variants
+    blocked = asyncio.Event()
+
+    async def body(page, market):
+        if market.code == "in":
+            await blocked.wait()
+
+    await scheduler.run(us_item, "us", body)
+    await scheduler.close()
+    assert not scheduler._outcomes
@@ -0,0 +1,38 @@
+"""
+Test Suite for Startup Optimisation
+Description: Unit tests of the source fingerprint keying the collection cache, run against
+a throwaway project directory.
+"""
+
+import pytest
+
+from utils.startup import source_fingerprint
+
+
+@pytest.fixture
+def project(tmp_path):
+    """A project with tests, page objects, a conftest, an ini file and a virtualenv."""
+    for directory in ("tests", "pages", "venv/lib"):
+        (tmp_path / directory).mkdir(parents=True)
+    (tmp_path / "pytest.ini").write_text("[pytest]\ntestpaths = tests\n")
+    (tmp_path / "conftest.py").write_text("pytest_plugins = []\n")
+    (tmp_path / "tests" / "test_search.py").write_text("def test_search():\n    pass\n")
+    (tmp_path / "pages" / "search_page.py").write_text("SEARCH_BOX = '#search'\n")
+    (tmp_path / "venv" / "lib" / "site.py").write_text("VERSION = 1\n")
+    return tmp_path
+
+
+@pytest.mark.parametrize("path", ["tests/test_search.py", "pages/search_page.py", "conftest.py", "pytest.ini"])
+def test_source_edits_change_fingerprint(project, path):
+    """Test that editing a test, page object, conftest or ini file changes the fingerprint."""
+    before = source_fingerprint(str(project), ["tests"])
+    (project / path).write_text((project / path).read_text() + "\n# edited\n")
+    assert source_fingerprint(str(project), ["tests"]) != before
+
+
+def test_files_outside_sources_are_ignored(project):
+    """Test that virtualenvs and outputs below the rootdir don't change the fingerprint."""
+    before = source_fingerprint(str(project), ["tests"])
+    (project / "venv" / "lib" / "site.py").write_text("VERSION = 2\n")
+    (project / "results.json").write_text("{}\n")
+    assert source_fingerprint(str(project), ["tests"]) == before
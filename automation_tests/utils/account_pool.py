@@ -0,0 +1,309 @@
+"""
+Account Pool
+This module leases test accounts to concurrent login tests so no two workers sign in with
+the same identity at once. Leases expire if a worker dies, accounts cool down after failed
+logins, and each account has a login rate limit. Lease state is shared by every worker on
+the machine through a small JSON file guarded by a lock file. It is not shared between
+machines, so distributed runs need a disjoint set of accounts on each worker host.
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import time
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, replace
+from typing import AsyncIterator, Dict, List
+
+import pytest
+
+from utils.file_lock import FileLock
+
+
+DEFAULT_EMAIL = "testuser@example.com"
+DEFAULT_PASSWORD = "TestPassword123!"
+DEFAULT_STATE_DIR = os.path.join(tempfile.gettempdir(), "amazon-account-pool")
+
+DEFAULT_LEASE_TTL = 300.0
+DEFAULT_COOLDOWN = 900.0
+DEFAULT_MAX_LOGINS = 8
+DEFAULT_RATE_WINDOW = 300.0
+DEFAULT_ACQUIRE_TIMEOUT = 120.0
+
+POLL_INTERVAL = 0.5
+MIN_WAIT = 0.01
+
+
+class AccountPoolTimeout(TimeoutError):
+    """Raised when no account becomes available within the lease timeout."""
+
+
+@dataclass(frozen=True)
+class Account:
+    """Credentials of one test account."""
+
+    email: str
+    password: str
+    max_logins: int = DEFAULT_MAX_LOGINS
+    rate_window: float = DEFAULT_RATE_WINDOW
+    cools_down: bool = True
+
+    @property
+    def account_id(self) -> str:
+        """Key of the account in the shared lease state."""
+        return self.email.lower()
+
+
+def load_accounts() -> List[Account]:
+    """
+    Load accounts from the environment.
+
+    Sources, in order of precedence:
+    - ACCOUNT_POOL_JSON: JSON list of accounts, for example a pipeline secret variable
+    - ACCOUNT_POOL_FILE: path to a JSON file with the same list
+    - TEST_EMAIL / TEST_PASSWORD: a single account, which does not cool down
+
+    Each entry needs "email" and "password" and may set "max_logins", "rate_window" and
+    "cools_down".
+
+    Returns:
+        Accounts in the pool
+    """
+    raw = os.environ.get("ACCOUNT_POOL_JSON")
+    if not raw and os.environ.get("ACCOUNT_POOL_FILE"):
+        with open(os.environ["ACCOUNT_POOL_FILE"], encoding="utf-8") as handle:
+            raw = handle.read()
+    if raw:
+        entries = json.loads(raw)
+        if isinstance(entries, dict):
+            entries = entries.get("accounts", [])
+        return [Account(**entry) for entry in entries]
+    # Usually a placeholder whose logins always fail; a cooldown would block every later run
+    return [replace(default_account(), cools_down=False)]
+
+
+def default_account() -> Account:
+    """
+    The single account configured through TEST_EMAIL and TEST_PASSWORD.
+
+    Returns:
+        The account, with the placeholder credentials as fallback
+    """
+    return Account(
+        email=os.environ.get("TEST_EMAIL", DEFAULT_EMAIL),
+        password=os.environ.get("TEST_PASSWORD", DEFAULT_PASSWORD),
+    )
+
+
+class AccountLease:
+    """An account held by one test until it is released."""
+
+    def __init__(self, pool: "AccountPool", account: Account, token: str):
+        self.pool = pool
+        self.account = account
+        self.token = token
+        self.released = False
+
+    @property
+    def email(self) -> str:
+        """Email of the leased account."""
+        return self.account.email
+
+    @property
+    def password(self) -> str:
+        """Password of the leased account."""
+        return self.account.password
+
+    async def record_login(self) -> None:
+        """Count a submitted login against the account's rate limit."""
+        await self.pool._record_login(self)
+
+    async def renew(self) -> None:
+        """Extend the lease for long-running tests."""
+        await self.pool._renew(self)
+
+    async def report_failure(self) -> None:
+        """Mark a failed login; the account cools down if it is set to, and the lease is released."""
+        if not self.released:
+            await self.pool._release(self, failed=True)
+
+    async def release(self) -> None:
+        """Return the account to the pool."""
+        if not self.released:
+            await self.pool._release(self, failed=False)
+
+
+class AccountPool:
+    """Leases accounts with expiry, cooldown and per-account rate limits."""
+
+    def __init__(self, accounts: List[Account], state_dir: str = DEFAULT_STATE_DIR,
+                 lease_ttl: float = DEFAULT_LEASE_TTL, cooldown: float = DEFAULT_COOLDOWN):
+        """
+        Initialize the account pool.
+
+        Args:
+            accounts: Accounts available for leasing
+            state_dir: Directory of the lease state shared by all workers
+            lease_ttl: Seconds after which an unreleased lease is reclaimed
+            cooldown: Seconds an account is unavailable after a failed login
+        """
+        if not accounts:
+            raise ValueError("account pool needs at least one account")
+        self.accounts = {account.account_id: account for account in accounts}
+        self.state_dir = state_dir
+        self.lease_ttl = lease_ttl
+        self.cooldown = cooldown
+        self.state_path = os.path.join(state_dir, "leases.json")
+        self.lock_path = os.path.join(state_dir, "leases.lock")
+        os.makedirs(state_dir, exist_ok=True)
+
+    @asynccontextmanager
+    async def _locked_state(self) -> AsyncIterator[Dict[str, dict]]:
+        """Hold the cross-process lock and yield the mutable lease state."""
+        async with FileLock(self.lock_path):
+            try:
+                with open(self.state_path, encoding="utf-8") as handle:
+                    state = json.load(handle)
+            except (OSError, ValueError):
+                state = {}
+            yield state
+            temp_path = f"{self.state_path}.{os.getpid()}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as handle:
+                json.dump(state, handle)
+            os.replace(temp_path, self.state_path)
+
+    def _available_at(self, account: Account, entry: dict, now: float) -> float:
+        """Earliest time the account can be leased; now or earlier means available."""
+        available = now
+        lease = entry.get("lease")
+        if lease and lease["expires"] > now:
+            available = max(available, lease["expires"])
+        available = max(available, entry.get("cooldown_until", 0.0))
+        logins = [t for t in entry.get("logins", []) if t > now - account.rate_window]
+        entry["logins"] = logins
+        if len(logins) >= account.max_logins:
+            available = max(available, logins[-account.max_logins] + account.rate_window)
+        return available
+
+    async def acquire(self, timeout: float = DEFAULT_ACQUIRE_TIMEOUT) -> AccountLease:
+        """
+        Lease an available account, waiting until one frees up.
+
+        Args:
+            timeout: Seconds to wait before giving up
+
+        Returns:
+            The lease
+
+        Raises:
+            AccountPoolTimeout: If no account became available in time
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            async with self._locked_state() as state:
+                now = time.time()
+                candidates = []
+                next_available = float("inf")
+                for account_id, account in self.accounts.items():
+                    entry = state.setdefault(account_id, {})
+                    available_at = self._available_at(account, entry, now)
+                    if available_at <= now:
+                        last_login = entry["logins"][-1] if entry["logins"] else 0.0
+                        candidates.append((last_login, account_id))
+                    next_available = min(next_available, available_at)
+                if candidates:
+                    # The least recently used account spreads logins evenly
+                    _, account_id = min(candidates)
+                    token = uuid.uuid4().hex
+                    entry = state[account_id]
+                    entry["lease"] = {"token": token, "expires": now + self.lease_ttl, "pid": os.getpid()}
+                    return AccountLease(self, self.accounts[account_id], token)
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise AccountPoolTimeout(
+                    f"No account available within {timeout:g}s "
+                    f"({len(self.accounts)} accounts leased, cooling down or rate limited)"
+                )
+            wait = min(max(next_available - time.time(), MIN_WAIT), POLL_INTERVAL, remaining)
+            await asyncio.sleep(wait)
+
+    @asynccontextmanager
+    async def lease(self, timeout: float = DEFAULT_ACQUIRE_TIMEOUT) -> AsyncIterator[AccountLease]:
+        """
+        Lease an account for the duration of a block.
+
+        Args:
+            timeout: Seconds to wait for an account
+
+        Yields:
+            The lease; it is released when the block exits
+        """
+        lease = await self.acquire(timeout)
+        try:
+            yield lease
+        finally:
+            await lease.release()
+
+    async def _record_login(self, lease: AccountLease) -> None:
+        async with self._locked_state() as state:
+            entry = state.setdefault(lease.account.account_id, {})
+            entry.setdefault("logins", []).append(time.time())
+
+    async def _renew(self, lease: AccountLease) -> None:
+        async with self._locked_state() as state:
+            current = state.get(lease.account.account_id, {}).get("lease")
+            if current and current["token"] == lease.token:
+                current["expires"] = time.time() + self.lease_ttl
+
+    async def _release(self, lease: AccountLease, failed: bool) -> None:
+        lease.released = True
+        async with self._locked_state() as state:
+            entry = state.setdefault(lease.account.account_id, {})
+            current = entry.get("lease")
+            if current and current["token"] == lease.token:
+                entry["lease"] = None
+            if failed and lease.account.cools_down:
+                entry["cooldown_until"] = time.time() + self.cooldown
+
+
+def pytest_addoption(parser):
+    """Register account pool command line options."""
+    group = parser.getgroup("accounts", "test account pool")
+    group.addoption(
+        "--account-lease-timeout",
+        type=float,
+        default=DEFAULT_ACQUIRE_TIMEOUT,
+        help="Seconds a test waits for a free account (default: 120)",
+    )
+    group.addoption(
+        "--account-state-dir",
+        default=os.environ.get("ACCOUNT_POOL_STATE_DIR", DEFAULT_STATE_DIR),
+        help="Directory of the lease state shared by all workers on this machine",
+    )
+
+
+@pytest.fixture(scope="session")
+def account_pool(request) -> AccountPool:
+    """Pool of test accounts shared by all workers on this machine."""
+    return AccountPool(
+        load_accounts(),
+        state_dir=request.config.getoption("--account-state-dir"),
+        lease_ttl=float(os.environ.get("ACCOUNT_LEASE_TTL", DEFAULT_LEASE_TTL)),
+        cooldown=float(os.environ.get("ACCOUNT_COOLDOWN", DEFAULT_COOLDOWN)),
+    )
+
+
+@pytest.fixture
+async def leased_account(account_pool, request) -> AccountLease:
+    """Account leased for the current test and released afterwards."""
+    async with account_pool.lease(request.config.getoption("--account-lease-timeout")) as lease:
+        yield lease
+
+
+@pytest.fixture
+def form_account() -> Account:
+    """Credentials for tests that fill in the login form without submitting it; not leased."""
+    return default_account()
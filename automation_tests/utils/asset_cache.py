@@ -0,0 +1,399 @@
+"""
+Shared Asset Cache
+This module serves static assets (scripts, stylesheets, fonts and images) to every browser
+context from an on-disk, content-addressed store, so each test doesn't download the same
+bundles again. Only cacheable responses without cookies are stored, and cookies and
+storage stay isolated per context. The store is shared by runs and workers on the machine
+and is kept under a size limit by least-recently-used eviction.
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional
+
+import pytest
+
+from utils.file_lock import FileLock
+from utils.stream_reporter import get_stream_reporter
+
+
+DEFAULT_CACHE_DIR = ".asset-cache"
+DEFAULT_MAX_MB = 500
+DEFAULT_TTL_HOURS = 24.0
+
+STATIC_ASSET_PATTERN = re.compile(
+    r"^https?://[^?#]+\.(?:js|mjs|css|woff2?|ttf|otf|eot|png|jpe?g|gif|webp|avif|svg|ico)(?:[?#].*)?$",
+    re.IGNORECASE,
+)
+
+# Headers that describe one transfer rather than the asset; the stored body is decoded
+TRANSFER_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive",
+                    "date", "age", "set-cookie", "set-cookie2"}
+
+
+@dataclass
+class CacheEntry:
+    """A stored response, pointing at its body by content hash."""
+
+    digest: str
+    status: int
+    headers: Dict[str, str]
+    size: int
+    expires: float
+    last_used: float
+
+
+def is_cacheable(status: int, headers: Dict[str, str]) -> bool:
+    """
+    Check whether a response may be shared between contexts.
+
+    Args:
+        status: HTTP status code
+        headers: Response headers with lower-case names
+
+    Returns:
+        True for successful responses that are neither private, uncached or revalidated
+        on every use, set no cookies and vary on nothing but Accept-Encoding
+    """
+    if status != 200 or "set-cookie" in headers:
+        return False
+    cache_control = headers.get("cache-control", "").lower()
+    # no-cache responses must be revalidated with the server before every reuse
+    if any(directive in cache_control for directive in ("no-store", "no-cache", "private")):
+        return False
+    # Entries are keyed by URL alone, so a body chosen by any other request header (origin,
+    # accept, cookie) could be replayed to requests it does not match
+    vary = {name.strip() for name in headers.get("vary", "").lower().split(",") if name.strip()}
+    return vary <= {"accept-encoding"}
+
+
+def freshness_lifetime(headers: Dict[str, str], default: float) -> float:
+    """
+    Work out how long a response stays fresh.
+
+    Args:
+        headers: Response headers with lower-case names
+        default: Lifetime in seconds when the response does not set max-age
+
+    Returns:
+        Lifetime in seconds
+    """
+    match = re.search(r"(?:^|,)\s*(?:s-)?max-age\s*=\s*(\d+)", headers.get("cache-control", ""), re.IGNORECASE)
+    return float(match.group(1)) if match else default
+
+
+class AssetStore:
+    """On-disk content-addressed store with an LRU index of URLs."""
+
+    def __init__(self, directory: str, max_bytes: int):
+        """
+        Initialize the store and load the index written by earlier runs.
+
+        Args:
+            directory: Directory holding the objects and the index
+            max_bytes: Size limit of the stored bodies
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(directory, "index.json")
+        self.lock_path = os.path.join(directory, "index.lock")
+        self.entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.evictions = 0
+        self.total_bytes = 0
+        # Bodies are shared by URLs with identical content, so sizes are counted per digest
+        self._references: Dict[str, int] = {}
+        os.makedirs(os.path.join(directory, "objects"), exist_ok=True)
+        for url, entry in self._read_index().items():
+            self._add(url, entry)
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "objects", digest[:2], digest[2:])
+
+    def _read_index(self) -> "OrderedDict[str, CacheEntry]":
+        try:
+            with open(self.index_path, encoding="utf-8") as handle:
+                raw = json.load(handle)
+        except (OSError, ValueError):
+            return OrderedDict()
+        entries = sorted(((url, CacheEntry(**entry)) for url, entry in raw.items()), key=lambda kv: kv[1].last_used)
+        return OrderedDict(entries)
+
+    def _add(self, url: str, entry: CacheEntry) -> None:
+        if url in self.entries:
+            self._remove(url)
+        self.entries[url] = entry
+        self._references[entry.digest] = self._references.get(entry.digest, 0) + 1
+        if self._references[entry.digest] == 1:
+            self.total_bytes += entry.size
+
+    def _remove(self, url: str) -> bool:
+        """Drop a URL from the index; returns True if its body is no longer referenced."""
+        entry = self.entries.pop(url)
+        self._references[entry.digest] -= 1
+        if self._references[entry.digest]:
+            return False
+        del self._references[entry.digest]
+        self.total_bytes -= entry.size
+        return True
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        """
+        Look up a fresh entry and mark it as recently used.
+
+        Args:
+            url: Request URL
+
+        Returns:
+            The entry, or None if missing or expired
+        """
+        entry = self.entries.get(url)
+        if entry is None:
+            return None
+        if entry.expires < time.time():
+            self._remove(url)
+            return None
+        entry.last_used = time.time()
+        self.entries.move_to_end(url)
+        return entry
+
+    def read(self, entry: CacheEntry) -> Optional[bytes]:
+        """
+        Read the body of an entry.
+
+        Args:
+            entry: Entry returned by get()
+
+        Returns:
+            Body bytes, or None if another process evicted the object
+        """
+        try:
+            with open(self._object_path(entry.digest), "rb") as handle:
+                return handle.read()
+        except OSError:
+            return None
+
+    def put(self, url: str, status: int, headers: Dict[str, str], body: bytes, lifetime: float) -> None:
+        """
+        Store a response body under its content hash and index it by URL.
+
+        Args:
+            url: Request URL
+            status: HTTP status code
+            headers: Response headers with lower-case names
+            body: Decoded response body
+            lifetime: Seconds the entry stays fresh
+        """
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as handle:
+                handle.write(body)
+            # Objects are immutable, so concurrent writers of the same digest are harmless
+            os.replace(temp_path, path)
+        now = time.time()
+        self._add(url, CacheEntry(
+            digest=digest,
+            status=status,
+            headers={name: value for name, value in headers.items() if name not in TRANSFER_HEADERS},
+            size=len(body),
+            expires=now + lifetime,
+            last_used=now,
+        ))
+        self._evict()
+
+    def _evict(self) -> None:
+        while self.total_bytes > self.max_bytes and self.entries:
+            url, entry = next(iter(self.entries.items()))
+            self.evictions += 1
+            if self._remove(url):
+                try:
+                    os.remove(self._object_path(entry.digest))
+                except OSError:
+                    pass
+
+    def save(self) -> None:
+        """Merge the index with entries saved by other processes and write it."""
+        with FileLock(self.lock_path):
+            merged = self._read_index()
+            for url, entry in self.entries.items():
+                current = merged.get(url)
+                if current is None or current.last_used <= entry.last_used:
+                    merged[url] = entry
+            now = time.time()
+            self.entries = OrderedDict()
+            self._references = {}
+            self.total_bytes = 0
+            for url, entry in sorted(merged.items(), key=lambda kv: kv[1].last_used):
+                if entry.expires >= now:
+                    self._add(url, entry)
+            self._evict()
+            temp_path = f"{self.index_path}.{os.getpid()}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as handle:
+                json.dump({url: asdict(entry) for url, entry in self.entries.items()}, handle)
+            os.replace(temp_path, self.index_path)
+
+
+class AssetCache:
+    """Pytest plugin routing static assets of every context through the shared store."""
+
+    def __init__(self, config, store: Optional[AssetStore], ttl: float):
+        """
+        Initialize the asset cache.
+
+        Args:
+            config: Pytest config object
+            store: Shared store, or None when the cache is disabled
+            ttl: Freshness lifetime in seconds for responses without max-age
+        """
+        self.config = config
+        self.store = store
+        self.enabled = store is not None
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.failed = 0
+        self.bytes_saved = 0
+        self.bytes_fetched = 0
+
+    def context_options(self) -> dict:
+        """
+        Extra keyword arguments for browser.new_context().
+
+        Service workers are blocked so every asset request reaches the route handler
+        instead of being answered from a per-context service worker cache.
+        """
+        return {"service_workers": "block"} if self.enabled else {}
+
+    async def attach(self, context) -> None:
+        """
+        Serve the static assets of a context from the shared store.
+
+        Args:
+            context: Playwright BrowserContext created with context_options()
+        """
+        if self.enabled:
+            await context.route(STATIC_ASSET_PATTERN, self._handle)
+
+    async def _handle(self, route, request) -> None:
+        if request.method != "GET":
+            await route.fallback()
+            return
+        entry = self.store.get(request.url)
+        body = self.store.read(entry) if entry is not None else None
+        if body is not None:
+            self.hits += 1
+            self.bytes_saved += len(body)
+            await route.fulfill(status=entry.status, headers=entry.headers, body=body)
+            return
+
+        # Imported here; the module is already loaded once a context routes requests
+        from playwright.async_api import Error as PlaywrightError
+
+        try:
+            response = await route.fetch()
+            headers = response.headers
+            cacheable = is_cacheable(response.status, headers)
+            body = await response.body() if cacheable else b""
+        except PlaywrightError:
+            # DNS, TLS and connection errors fail the request as they would without the cache;
+            # an unanswered route would leave the page loading until the test times out
+            self.failed += 1
+            await route.abort()
+            return
+        if not cacheable:
+            self.bypassed += 1
+            await route.fulfill(response=response)
+            return
+        self.misses += 1
+        self.bytes_fetched += len(body)
+        self.store.put(request.url, response.status, headers, body, freshness_lifetime(headers, self.ttl))
+        # Fulfilling from the fetch response keeps its original encoding and length headers
+        await route.fulfill(response=response)
+
+    def summary(self) -> dict:
+        """Hit and byte counts of the run."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "failed": self.failed,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "bytes_saved": self.bytes_saved,
+            "bytes_fetched": self.bytes_fetched,
+            "evictions": self.store.evictions,
+            "stored_bytes": self.store.total_bytes,
+        }
+
+    def pytest_sessionfinish(self, session):
+        if not self.enabled:
+            return
+        self.store.save()
+        reporter = get_stream_reporter(self.config)
+        if reporter is not None:
+            reporter.emit({"event": "asset_cache", "time": time.time(), **self.summary()})
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if not self.enabled:
+            return
+        summary = self.summary()
+        terminalreporter.section("asset cache")
+        write = terminalreporter.write_line
+        write(f"Hits {summary['hits']}, misses {summary['misses']}, not cacheable {summary['bypassed']}, "
+              f"failed {summary['failed']} (hit rate {summary['hit_rate']:.0%})")
+        write(f"Served from cache {summary['bytes_saved'] / 1e6:.1f}MB, downloaded {summary['bytes_fetched'] / 1e6:.1f}MB")
+        write(f"Store {summary['stored_bytes'] / 1e6:.1f}MB of {self.store.max_bytes / 1e6:.0f}MB "
+              f"in {self.store.directory}, {summary['evictions']} evictions")
+
+
+def pytest_addoption(parser):
+    """Register asset cache command line options."""
+    group = parser.getgroup("asset_cache", "shared static asset cache")
+    group.addoption(
+        "--asset-cache",
+        nargs="?",
+        const=DEFAULT_CACHE_DIR,
+        default=None,
+        metavar="DIR",
+        help="Serve static assets to every context from a shared on-disk cache in DIR "
+             "(default: <rootdir>/.asset-cache)",
+    )
+    group.addoption(
+        "--asset-cache-max-mb",
+        type=float,
+        default=DEFAULT_MAX_MB,
+        help="Size limit of the asset cache (default: 500)",
+    )
+    group.addoption(
+        "--asset-cache-ttl-hours",
+        type=float,
+        default=DEFAULT_TTL_HOURS,
+        help="Lifetime of cached assets whose response sets no max-age (default: 24)",
+    )
+
+
+def pytest_configure(config):
+    """Register the asset cache so contexts can be attached and the summary is reported."""
+    directory = config.getoption("--asset-cache")
+    store = None
+    if directory:
+        store = AssetStore(
+            os.path.join(str(config.rootpath), directory),
+            max_bytes=int(config.getoption("--asset-cache-max-mb") * 1024 * 1024),
+        )
+    ttl = config.getoption("--asset-cache-ttl-hours") * 3600
+    config.pluginmanager.register(AssetCache(config, store, ttl), "asset_cache")
+
+
+@pytest.fixture(scope="session")
+def asset_cache(request) -> AssetCache:
+    """The session's shared asset cache."""
+    return request.config.pluginmanager.get_plugin("asset_cache")
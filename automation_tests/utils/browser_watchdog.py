@@ -0,0 +1,272 @@
+"""
+Browser Watchdog
+This module keeps long runs healthy on a single session browser. It samples browser and
+renderer process memory and CPU plus open context and page counts between tests, and
+drains and relaunches the browser when a configured threshold is crossed.
+"""
+
+import time
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, List, Optional
+
+import pytest
+
+from utils.stream_reporter import get_stream_reporter
+
+if TYPE_CHECKING:
+    import psutil
+
+
+BROWSER_PROCESS_NAMES = ("chrome", "chromium", "headless_shell", "msedge")
+
+
+class BrowserManager:
+    """Owns the session browser and can replace it with a fresh instance."""
+
+    def __init__(self, launcher: Callable[[], Awaitable]):
+        """
+        Initialize the browser manager.
+
+        Args:
+            launcher: Coroutine function launching a new Playwright Browser
+        """
+        self.launcher = launcher
+        self.browser = None
+        self.generation = 0
+        self._recycle_callbacks: List[Callable[[], Awaitable[None]]] = []
+
+    def on_recycle(self, callback: Callable[[], Awaitable[None]]) -> None:
+        """
+        Register a coroutine function called before the browser is closed for recycling.
+
+        Holders of long-lived contexts, such as context pools, use this to drain them.
+
+        Args:
+            callback: Coroutine function without arguments
+        """
+        self._recycle_callbacks.append(callback)
+
+    async def start(self) -> None:
+        """Launch the first browser."""
+        self.browser = await self.launcher()
+        self.generation = 1
+
+    async def relaunch(self) -> None:
+        """Drain long-lived contexts, close the browser and launch a new one."""
+        for callback in self._recycle_callbacks:
+            await callback()
+        try:
+            await self.browser.close()
+        except Exception:
+            # A crashed browser cannot be closed cleanly; relaunching is the fix
+            pass
+        self.browser = await self.launcher()
+        self.generation += 1
+
+    async def close(self) -> None:
+        """Close the current browser."""
+        if self.browser is not None:
+            await self.browser.close()
+            self.browser = None
+
+
+def sample_browser_processes(cpu_cache: Dict[int, "psutil.Process"]) -> Dict[str, float]:
+    """
+    Measure memory and CPU of the browser processes started by this test process.
+
+    Args:
+        cpu_cache: Process objects from earlier samples, needed for CPU deltas
+
+    Returns:
+        Dictionary with total_rss_mb, max_renderer_rss_mb, cpu_percent and process counts
+    """
+    # Imported on first sample; runs without --watchdog never need it
+    import psutil
+
+    total_rss = 0
+    max_renderer_rss = 0
+    cpu = 0.0
+    processes = 0
+    renderers = 0
+    seen = set()
+    for child in psutil.Process().children(recursive=True):
+        try:
+            if not child.name().lower().startswith(BROWSER_PROCESS_NAMES):
+                continue
+            process = cpu_cache.setdefault(child.pid, child)
+            seen.add(child.pid)
+            rss = process.memory_info().rss
+            cpu += process.cpu_percent(interval=None)
+            total_rss += rss
+            processes += 1
+            if "--type=renderer" in process.cmdline():
+                renderers += 1
+                max_renderer_rss = max(max_renderer_rss, rss)
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            continue
+    for pid in set(cpu_cache) - seen:
+        del cpu_cache[pid]
+    return {
+        "total_rss_mb": total_rss / (1024 * 1024),
+        "max_renderer_rss_mb": max_renderer_rss / (1024 * 1024),
+        "cpu_percent": cpu,
+        "processes": processes,
+        "renderers": renderers,
+    }
+
+
+class BrowserWatchdog:
+    """Recycles the browser when resource usage crosses configured thresholds."""
+
+    def __init__(self, config, enabled: bool, max_rss_mb: float, max_renderer_rss_mb: float,
+                 max_contexts: int, max_pages: int, recycle_every: int, sample_every: int):
+        """
+        Initialize the watchdog.
+
+        Args:
+            config: Pytest config object
+            enabled: Whether thresholds are enforced
+            max_rss_mb: Limit for the combined RSS of all browser processes
+            max_renderer_rss_mb: Limit for the RSS of any single renderer process
+            max_contexts: Limit for open browser contexts between tests
+            max_pages: Limit for open pages between tests
+            recycle_every: Relaunch after this many tests regardless of usage (0 disables)
+            sample_every: Sample resource usage every this many tests
+        """
+        self.config = config
+        self.enabled = enabled
+        self.max_rss_mb = max_rss_mb
+        self.max_renderer_rss_mb = max_renderer_rss_mb
+        self.max_contexts = max_contexts
+        self.max_pages = max_pages
+        self.recycle_every = recycle_every
+        self.sample_every = max(sample_every, 1)
+        self.tests_seen = 0
+        self.tests_since_recycle = 0
+        self.last_sample: Optional[Dict[str, float]] = None
+        self.peak_rss_mb = 0.0
+        self.events: List[dict] = []
+        self._cpu_cache: Dict[int, "psutil.Process"] = {}
+
+    def sample(self, browser) -> Dict[str, float]:
+        """
+        Take a resource sample of the browser.
+
+        Args:
+            browser: Playwright Browser object
+
+        Returns:
+            Process metrics plus open context and page counts
+        """
+        metrics = sample_browser_processes(self._cpu_cache)
+        contexts = browser.contexts
+        metrics["contexts"] = len(contexts)
+        metrics["pages"] = sum(len(context.pages) for context in contexts)
+        metrics["time"] = time.time()
+        self.peak_rss_mb = max(self.peak_rss_mb, metrics["total_rss_mb"])
+        self.last_sample = metrics
+        return metrics
+
+    def _violations(self, metrics: Dict[str, float]) -> List[str]:
+        reasons = []
+        if self.max_rss_mb and metrics["total_rss_mb"] > self.max_rss_mb:
+            reasons.append(f"browser RSS {metrics['total_rss_mb']:.0f}MB > {self.max_rss_mb:.0f}MB")
+        if self.max_renderer_rss_mb and metrics["max_renderer_rss_mb"] > self.max_renderer_rss_mb:
+            reasons.append(f"renderer RSS {metrics['max_renderer_rss_mb']:.0f}MB > {self.max_renderer_rss_mb:.0f}MB")
+        if self.max_contexts and metrics["contexts"] > self.max_contexts:
+            reasons.append(f"{metrics['contexts']} open contexts > {self.max_contexts}")
+        if self.max_pages and metrics["pages"] > self.max_pages:
+            reasons.append(f"{metrics['pages']} open pages > {self.max_pages}")
+        return reasons
+
+    async def check(self, manager: BrowserManager, nodeid: str = "") -> None:
+        """
+        Sample the browser before a test and recycle it if a threshold is crossed.
+
+        Args:
+            manager: Browser manager owning the session browser
+            nodeid: Node id of the test about to run
+        """
+        if not self.enabled:
+            return
+        self.tests_seen += 1
+        self.tests_since_recycle += 1
+        reasons = []
+        if self.recycle_every and self.tests_since_recycle > self.recycle_every:
+            reasons.append(f"{self.recycle_every} tests since last recycle")
+        metrics = None
+        if (self.tests_seen - 1) % self.sample_every == 0 or reasons:
+            metrics = self.sample(manager.browser)
+            reasons += self._violations(metrics)
+            reporter = get_stream_reporter(self.config)
+            if reporter is not None:
+                reporter.emit({"event": "watchdog_sample", "nodeid": nodeid, **metrics})
+        if not reasons:
+            return
+
+        started = time.perf_counter()
+        await manager.relaunch()
+        event = {
+            "event": "watchdog_recycle",
+            "time": time.time(),
+            "nodeid": nodeid,
+            "generation": manager.generation,
+            "reasons": reasons,
+            "before": metrics,
+            "duration": time.perf_counter() - started,
+        }
+        self.events.append(event)
+        self.tests_since_recycle = 1
+        reporter = get_stream_reporter(self.config)
+        if reporter is not None:
+            reporter.emit(event)
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if not self.enabled:
+            return
+        terminalreporter.section("browser watchdog")
+        write = terminalreporter.write_line
+        write(f"Tests observed: {self.tests_seen}, peak browser RSS {self.peak_rss_mb:.0f}MB, "
+              f"recycles: {len(self.events)}")
+        for event in self.events:
+            write(f"  before {event['nodeid']}: {'; '.join(event['reasons'])} "
+                  f"(relaunch took {event['duration']:.1f}s)")
+
+
+def pytest_addoption(parser):
+    """Register browser watchdog command line options."""
+    group = parser.getgroup("watchdog", "browser resource watchdog")
+    group.addoption("--watchdog", action="store_true", default=False,
+                    help="Recycle the browser when resource thresholds are crossed")
+    group.addoption("--watchdog-max-rss-mb", type=float, default=2048.0,
+                    help="Combined RSS of browser processes that triggers a recycle (default: 2048)")
+    group.addoption("--watchdog-max-renderer-rss-mb", type=float, default=1024.0,
+                    help="RSS of a single renderer process that triggers a recycle (default: 1024)")
+    group.addoption("--watchdog-max-contexts", type=int, default=20,
+                    help="Open contexts between tests that trigger a recycle (default: 20)")
+    group.addoption("--watchdog-max-pages", type=int, default=50,
+                    help="Open pages between tests that trigger a recycle (default: 50)")
+    group.addoption("--watchdog-recycle-every", type=int, default=0,
+                    help="Recycle after this many tests regardless of usage (default: off)")
+    group.addoption("--watchdog-sample-every", type=int, default=5,
+                    help="Sample resource usage every this many tests (default: 5)")
+
+
+def pytest_configure(config):
+    """Register the watchdog so its summary appears in the terminal report."""
+    watchdog = BrowserWatchdog(
+        config,
+        enabled=config.getoption("--watchdog"),
+        max_rss_mb=config.getoption("--watchdog-max-rss-mb"),
+        max_renderer_rss_mb=config.getoption("--watchdog-max-renderer-rss-mb"),
+        max_contexts=config.getoption("--watchdog-max-contexts"),
+        max_pages=config.getoption("--watchdog-max-pages"),
+        recycle_every=config.getoption("--watchdog-recycle-every"),
+        sample_every=config.getoption("--watchdog-sample-every"),
+    )
+    config.pluginmanager.register(watchdog, "browser_watchdog")
+
+
+@pytest.fixture(scope="session")
+def browser_watchdog(request) -> BrowserWatchdog:
+    """The session's browser watchdog."""
+    return request.config.pluginmanager.get_plugin("browser_watchdog")
@@ -0,0 +1,459 @@
+"""
+Distributed Execution
+This module runs the suite across machines. A coordinator process collects the tests and
+serves them one at a time over TCP; workers on any number of hosts pull the next test when
+they finish one, send back reports and artifacts, and have their tests handed to other
+workers if they disconnect or stop sending heartbeats. Account leases stay local to each
+host (see utils/account_pool.py), so every worker host needs its own accounts.
+
+Usage:
+    pytest tests/ --dist-coordinator=0.0.0.0:8765          # on the coordinating agent
+    pytest tests/ --dist-worker=coordinator-host:8765      # on every worker agent
+"""
+
+import base64
+import collections
+import json
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+import pytest
+
+
+HEARTBEAT_INTERVAL = 5.0
+HEARTBEAT_MISSES = 3
+EMPTY_RETRY_INTERVAL = 1.0
+MAX_ARTIFACT_BYTES = 20 * 1024 * 1024
+
+
+def parse_address(value: str) -> Tuple[str, int]:
+    """
+    Split HOST:PORT into a socket address.
+
+    Args:
+        value: Address such as 0.0.0.0:8765 or agent-1:8765
+
+    Returns:
+        Tuple of host and port
+    """
+    host, _, port = value.rpartition(":")
+    if not host or not port.isdigit():
+        raise pytest.UsageError(f"expected HOST:PORT, got '{value}'")
+    return host, int(port)
+
+
+def _send(stream, message: dict, lock: Optional[threading.Lock] = None) -> None:
+    data = (json.dumps(message, default=str) + "\n").encode("utf-8")
+    if lock is None:
+        stream.write(data)
+        stream.flush()
+        return
+    with lock:
+        stream.write(data)
+        stream.flush()
+
+
+class Coordinator:
+    """Pytest plugin that serves collected tests to remote workers instead of running them."""
+
+    def __init__(self, config, address: Tuple[str, int], max_retries: int, idle_timeout: float,
+                 artifacts_dir: str):
+        """
+        Initialize the coordinator.
+
+        Args:
+            config: Pytest config object
+            address: Host and port to listen on
+            max_retries: How often a test is handed out again after its worker died while running it
+            idle_timeout: Seconds to wait with no connected worker before giving up
+            artifacts_dir: Directory receiving artifacts uploaded by workers
+        """
+        self.config = config
+        self.address = address
+        self.max_retries = max_retries
+        self.idle_timeout = idle_timeout
+        self.artifacts_dir = artifacts_dir
+        self.lock = threading.Lock()
+        self.events: "queue.Queue[tuple]" = queue.Queue()
+        self.pending: Deque[str] = collections.deque()
+        self.assigned: Dict[str, List[str]] = {}
+        # Assigned tests a worker has begun running; prefetched tests are assigned but not started
+        self.started: Set[str] = set()
+        self.attempts: Dict[str, int] = collections.Counter()
+        self.remaining = 0
+        self.workers: Dict[str, dict] = {}
+        self.history: Dict[str, dict] = {}
+        self.lost_workers = 0
+        self._artifact_counter = 0
+
+    # Called from connection threads
+
+    def register(self, worker: str, info: dict) -> None:
+        with self.lock:
+            self.workers[worker] = {**info, "connected": time.time(), "completed": 0}
+            self.history[worker] = self.workers[worker]
+            self.assigned[worker] = []
+        self.events.put(("log", f"worker {worker} connected from {info.get('host')}"))
+
+    def unregister(self, worker: str, reason: str) -> None:
+        with self.lock:
+            info = self.workers.pop(worker, None)
+            orphaned = self.assigned.pop(worker, [])
+            requeued = 0
+            if orphaned and info is not None:
+                self.lost_workers += 1
+                info["lost"] = reason
+            for nodeid in reversed(orphaned):
+                if nodeid in self.started:
+                    self.started.discard(nodeid)
+                    self.attempts[nodeid] += 1
+                if self.attempts[nodeid] <= self.max_retries:
+                    self.pending.appendleft(nodeid)
+                    requeued += 1
+                else:
+                    self.remaining -= 1
+                    self.events.put(("lost", nodeid, f"worker {worker} was lost while running this test ({reason})"))
+        if info is not None:
+            handed = f", {requeued} tests handed to other workers" if requeued else ""
+            self.events.put(("log", f"worker {worker} disconnected ({reason}){handed}"))
+
+    def next_for(self, worker: str) -> dict:
+        with self.lock:
+            if self.pending:
+                nodeid = self.pending.popleft()
+                self.assigned.setdefault(worker, []).append(nodeid)
+                return {"type": "test", "nodeid": nodeid}
+            if self.remaining <= 0:
+                return {"type": "done"}
+            return {"type": "empty"}
+
+    def start(self, worker: str, nodeid: str) -> None:
+        with self.lock:
+            if nodeid in self.assigned.get(worker, []):
+                self.started.add(nodeid)
+
+    def complete(self, worker: str, message: dict) -> None:
+        nodeid = message["nodeid"]
+        with self.lock:
+            if nodeid not in self.assigned.get(worker, []):
+                # A result for a test that was already handed to another worker
+                return
+            self.assigned[worker].remove(nodeid)
+            self.started.discard(nodeid)
+            self.remaining -= 1
+            self.workers[worker]["completed"] += 1
+        paths = self._store_artifacts(worker, message.get("artifacts", []))
+        self.events.put(("result", nodeid, message["reports"], paths))
+
+    def missing(self, worker: str, nodeid: str) -> None:
+        with self.lock:
+            if nodeid not in self.assigned.get(worker, []):
+                return
+            self.assigned[worker].remove(nodeid)
+            self.remaining -= 1
+        self.events.put(("lost", nodeid, f"worker {worker} did not collect this test"))
+
+    def _store_artifacts(self, worker: str, artifacts: List[dict]) -> Dict[str, str]:
+        paths = {}
+        for artifact in artifacts:
+            with self.lock:
+                self._artifact_counter += 1
+                index = self._artifact_counter
+            target = os.path.join(self.artifacts_dir, worker, f"{index}_{os.path.basename(artifact['path'])}")
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "wb") as handle:
+                handle.write(base64.b64decode(artifact["data"]))
+            paths[artifact["path"]] = target
+        return paths
+
+    # Main thread
+
+    def _log_result(self, items: Dict[str, pytest.Item], nodeid: str, data: List[dict],
+                    paths: Dict[str, str]) -> None:
+        hook = self.config.hook
+        reports = []
+        for entry in data:
+            entry["user_properties"] = [
+                [key, paths.get(value, value) if key == "artifact" else value]
+                for key, value in entry.get("user_properties", [])
+            ]
+            reports.append(hook.pytest_report_from_serializable(config=self.config, data=entry))
+        location = reports[0].location if reports else items[nodeid].location
+        hook.pytest_runtest_logstart(nodeid=nodeid, location=location)
+        for report in reports:
+            hook.pytest_runtest_logreport(report=report)
+        hook.pytest_runtest_logfinish(nodeid=nodeid, location=location)
+
+    def _log_lost(self, items: Dict[str, pytest.Item], nodeid: str, reason: str) -> None:
+        hook = self.config.hook
+        item = items[nodeid]
+        keywords = {name: 1 for name in item.keywords}
+        hook.pytest_runtest_logstart(nodeid=nodeid, location=item.location)
+        hook.pytest_runtest_logreport(report=pytest.TestReport(
+            nodeid, item.location, keywords, "failed", reason, "setup"))
+        hook.pytest_runtest_logreport(report=pytest.TestReport(
+            nodeid, item.location, keywords, "passed", None, "teardown"))
+        hook.pytest_runtest_logfinish(nodeid=nodeid, location=item.location)
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtestloop(self, session):
+        if session.testsfailed and not session.config.option.continue_on_collection_errors:
+            raise session.Interrupted(f"{session.testsfailed} errors during collection")
+        if session.config.option.collectonly:
+            return True
+
+        items = {item.nodeid: item for item in session.items}
+        self.pending.extend(items)
+        self.remaining = len(items)
+        coordinator = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                worker = None
+                reason = "connection closed"
+                self.request.settimeout(HEARTBEAT_INTERVAL * HEARTBEAT_MISSES)
+                try:
+                    for line in self.rfile:
+                        message = json.loads(line)
+                        kind = message.get("type")
+                        if kind == "hello":
+                            worker = message["worker"]
+                            coordinator.register(worker, message)
+                        elif worker is None:
+                            break
+                        elif kind == "next":
+                            _send(self.wfile, coordinator.next_for(worker))
+                        elif kind == "start":
+                            coordinator.start(worker, message["nodeid"])
+                        elif kind == "result":
+                            coordinator.complete(worker, message)
+                        elif kind == "missing":
+                            coordinator.missing(worker, message["nodeid"])
+                except socket.timeout:
+                    reason = "heartbeat timeout"
+                except (OSError, ValueError) as error:
+                    reason = str(error) or type(error).__name__
+                finally:
+                    if worker is not None:
+                        coordinator.unregister(worker, reason)
+
+        class Server(socketserver.ThreadingTCPServer):
+            allow_reuse_address = True
+            daemon_threads = True
+
+        reporter = self.config.pluginmanager.get_plugin("terminalreporter")
+        started = time.time()
+        with Server(self.address, Handler) as server:
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            self._log(reporter, f"coordinator serving {len(items)} tests on {self.address[0]}:{server.server_address[1]}")
+            idle_since = time.time()
+            while True:
+                try:
+                    event = self.events.get(timeout=1.0)
+                except queue.Empty:
+                    event = None
+                if event is not None:
+                    if event[0] == "result":
+                        self._log_result(items, *event[1:])
+                    elif event[0] == "lost":
+                        self._log_lost(items, *event[1:])
+                    elif event[0] == "log":
+                        self._log(reporter, event[1])
+                    continue
+                with self.lock:
+                    finished = self.remaining <= 0
+                    connected = bool(self.workers)
+                if finished:
+                    break
+                if session.shouldfail or session.shouldstop:
+                    break
+                if connected:
+                    idle_since = time.time()
+                elif self.idle_timeout and time.time() - idle_since > self.idle_timeout:
+                    self._fail_unfinished(items, f"no worker connected for {self.idle_timeout:.0f}s")
+                    break
+            # Let idle workers poll once more and receive "done" before the server goes away
+            deadline = time.time() + EMPTY_RETRY_INTERVAL * 3
+            while self.workers and time.time() < deadline:
+                time.sleep(0.1)
+            server.shutdown()
+        self._log(reporter, f"coordinator finished in {time.time() - started:.1f}s with "
+                            f"{len(self.history)} workers, {self.lost_workers} lost")
+        return True
+
+    def _fail_unfinished(self, items: Dict[str, pytest.Item], reason: str) -> None:
+        with self.lock:
+            unfinished = list(self.pending) + [n for nodeids in self.assigned.values() for n in nodeids]
+            self.pending.clear()
+            self.remaining = 0
+        for nodeid in unfinished:
+            self._log_lost(items, nodeid, reason)
+
+    def _log(self, reporter, message: str) -> None:
+        if reporter is not None:
+            reporter.write_line(f"[dist] {message}")
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if not self.history:
+            return
+        terminalreporter.section("distributed run")
+        for worker, info in sorted(self.history.items()):
+            lost = f", lost: {info['lost']}" if "lost" in info else ""
+            terminalreporter.write_line(f"{worker} ({info.get('host')}): {info['completed']} tests{lost}")
+
+
+class Worker:
+    """Pytest plugin that pulls tests from a coordinator and runs them locally."""
+
+    def __init__(self, config, address: Tuple[str, int], worker_id: str):
+        """
+        Initialize the worker.
+
+        Args:
+            config: Pytest config object
+            address: Host and port of the coordinator
+            worker_id: Name of this worker in the coordinator's reports
+        """
+        self.config = config
+        self.address = address
+        self.worker_id = worker_id
+        self.send_lock = threading.Lock()
+        self.reports: List[dict] = []
+        self.stream = None
+        self.reader = None
+        self._stop = threading.Event()
+
+    def _heartbeat(self) -> None:
+        while not self._stop.wait(HEARTBEAT_INTERVAL):
+            try:
+                _send(self.stream, {"type": "heartbeat"}, self.send_lock)
+            except OSError:
+                return
+
+    def _request(self, message: dict) -> dict:
+        _send(self.stream, message, self.send_lock)
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("coordinator closed the connection")
+        return json.loads(line)
+
+    def _collect_artifacts(self) -> List[dict]:
+        artifacts = []
+        seen = set()
+        for data in self.reports:
+            for key, value in data.get("user_properties", []):
+                if key != "artifact" or value in seen or not os.path.isfile(value):
+                    continue
+                seen.add(value)
+                if os.path.getsize(value) > MAX_ARTIFACT_BYTES:
+                    continue
+                with open(value, "rb") as handle:
+                    artifacts.append({"path": value, "data": base64.b64encode(handle.read()).decode("ascii")})
+        return artifacts
+
+    def pytest_runtest_logreport(self, report):
+        self.reports.append(self.config.hook.pytest_report_to_serializable(config=self.config, report=report))
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtestloop(self, session):
+        if session.testsfailed and not session.config.option.continue_on_collection_errors:
+            raise session.Interrupted(f"{session.testsfailed} errors during collection")
+        if session.config.option.collectonly:
+            return True
+
+        items = {item.nodeid: item for item in session.items}
+        sock = socket.create_connection(self.address)
+        self.stream = sock.makefile("wb")
+        self.reader = sock.makefile("rb")
+        _send(self.stream, {"type": "hello", "worker": self.worker_id, "host": socket.gethostname(),
+                            "pid": os.getpid(), "collected": len(items)}, self.send_lock)
+        threading.Thread(target=self._heartbeat, daemon=True).start()
+
+        # One test is prefetched so pytest knows the next item and keeps shared fixtures alive
+        queued: List[pytest.Item] = []
+        drained = False
+        try:
+            while True:
+                if session.shouldfail or session.shouldstop:
+                    break
+                if len(queued) < 2 and not drained:
+                    reply = self._request({"type": "next"})
+                    if reply["type"] == "test":
+                        item = items.get(reply["nodeid"])
+                        if item is None:
+                            _send(self.stream, {"type": "missing", "nodeid": reply["nodeid"]}, self.send_lock)
+                        else:
+                            queued.append(item)
+                        continue
+                    drained = True
+                    if reply["type"] == "done" and not queued:
+                        break
+                if queued:
+                    item = queued.pop(0)
+                    nextitem = queued[0] if queued else None
+                    self.reports = []
+                    _send(self.stream, {"type": "start", "nodeid": item.nodeid}, self.send_lock)
+                    item.config.hook.pytest_runtest_protocol(item=item, nextitem=nextitem)
+                    _send(self.stream, {"type": "result", "nodeid": item.nodeid, "reports": self.reports,
+                                        "artifacts": self._collect_artifacts()}, self.send_lock)
+                    continue
+                # Queue is empty but other workers are still busy; tests of a lost worker may come back
+                reply = self._request({"type": "next"})
+                if reply["type"] == "done":
+                    break
+                if reply["type"] == "test":
+                    drained = False
+                    item = items.get(reply["nodeid"])
+                    if item is None:
+                        _send(self.stream, {"type": "missing", "nodeid": reply["nodeid"]}, self.send_lock)
+                    else:
+                        queued.append(item)
+                else:
+                    time.sleep(EMPTY_RETRY_INTERVAL)
+        except (ConnectionError, OSError) as error:
+            raise session.Interrupted(f"lost connection to coordinator: {error}")
+        finally:
+            self._stop.set()
+            sock.close()
+        return True
+
+
+def pytest_addoption(parser):
+    """Register distributed execution command line options."""
+    group = parser.getgroup("distributed", "distributed execution across machines")
+    group.addoption("--dist-coordinator", default=None, metavar="HOST:PORT",
+                    help="Serve the collected tests to remote workers on HOST:PORT instead of running them")
+    group.addoption("--dist-worker", default=None, metavar="HOST:PORT",
+                    help="Pull tests from the coordinator at HOST:PORT and run them")
+    group.addoption("--dist-worker-id", default=None,
+                    help="Name of this worker (default: <hostname>-<pid>)")
+    group.addoption("--dist-max-retries", type=int, default=1,
+                    help="Times a test is handed out again after its worker died while running it (default: 1)")
+    group.addoption("--dist-idle-timeout", type=float, default=600.0,
+                    help="Seconds the coordinator waits with no connected worker (default: 600)")
+    group.addoption("--dist-artifacts-dir", default="dist-artifacts",
+                    help="Directory where the coordinator stores artifacts sent by workers")
+
+
+def pytest_configure(config):
+    """Register the coordinator or worker plugin."""
+    coordinator = config.getoption("--dist-coordinator")
+    worker = config.getoption("--dist-worker")
+    if coordinator and worker:
+        raise pytest.UsageError("--dist-coordinator and --dist-worker are mutually exclusive")
+    if coordinator:
+        config.pluginmanager.register(Coordinator(
+            config,
+            parse_address(coordinator),
+            max_retries=config.getoption("--dist-max-retries"),
+            idle_timeout=config.getoption("--dist-idle-timeout"),
+            artifacts_dir=config.getoption("--dist-artifacts-dir"),
+        ), "dist_coordinator")
+    elif worker:
+        worker_id = config.getoption("--dist-worker-id") or f"{socket.gethostname()}-{os.getpid()}"
+        config.pluginmanager.register(Worker(config, parse_address(worker), worker_id), "dist_worker")
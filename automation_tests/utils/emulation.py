@@ -0,0 +1,321 @@
+"""
+Network and CPU Emulation
+This module runs tests under named device and network profiles from
+config/emulation_profiles.json. Network throttling and CPU slowdown are applied to every
+page through the Chrome DevTools Protocol, and flow timings are collected per profile and
+checked against the budgets in the same file.
+"""
+
+import asyncio
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+import pytest
+
+from utils.stream_reporter import get_stream_reporter
+
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                   "config", "emulation_profiles.json")
+UNEMULATED = "native"
+
+NAVIGATION_TIMING_SCRIPT = """() => {
+    const [entry] = performance.getEntriesByType("navigation");
+    return entry ? {
+        ttfb_ms: entry.responseStart,
+        dom_content_loaded_ms: entry.domContentLoadedEventEnd,
+        load_ms: entry.loadEventEnd,
+    } : null;
+}"""
+
+
+@dataclass(frozen=True)
+class EmulationProfile:
+    """A device and network profile."""
+
+    name: str
+    description: str = ""
+    latency_ms: float = 0.0
+    download_kbps: float = 0.0
+    upload_kbps: float = 0.0
+    cpu_slowdown: float = 1.0
+    context: Dict[str, object] = field(default_factory=dict)
+
+    @property
+    def throttles_network(self) -> bool:
+        """Whether the profile changes latency or bandwidth."""
+        return bool(self.latency_ms or self.download_kbps or self.upload_kbps)
+
+    def context_options(self) -> dict:
+        """Keyword arguments for browser.new_context(), such as viewport and user agent."""
+        return dict(self.context)
+
+    def network_conditions(self) -> dict:
+        """Parameters of Network.emulateNetworkConditions; throughput is in bytes per second."""
+        return {
+            "offline": False,
+            "latency": self.latency_ms,
+            "downloadThroughput": self.download_kbps * 1000 / 8 if self.download_kbps else -1,
+            "uploadThroughput": self.upload_kbps * 1000 / 8 if self.upload_kbps else -1,
+        }
+
+    async def apply(self, context, page) -> None:
+        """
+        Throttle the network and CPU of a page.
+
+        Args:
+            context: Playwright BrowserContext owning the page
+            page: Playwright Page object
+        """
+        if not self.throttles_network and self.cpu_slowdown <= 1:
+            return
+        # Emulation stays active while the session is attached, i.e. for the page's lifetime
+        session = await context.new_cdp_session(page)
+        if self.throttles_network:
+            await session.send("Network.enable")
+            await session.send("Network.emulateNetworkConditions", self.network_conditions())
+        if self.cpu_slowdown > 1:
+            await session.send("Emulation.setCPUThrottlingRate", {"rate": self.cpu_slowdown})
+
+
+@lru_cache(maxsize=None)
+def load_emulation_config(path: str = DEFAULT_CONFIG_PATH) -> Tuple[Dict[str, EmulationProfile], Dict[str, Dict[str, float]]]:
+    """
+    Load emulation profiles and flow budgets once per process.
+
+    Args:
+        path: Path to the emulation profiles JSON file
+
+    Returns:
+        Profiles keyed by name, and budgets in milliseconds keyed by flow and profile
+    """
+    with open(path, encoding="utf-8") as handle:
+        config = json.load(handle)
+    profiles = {name: EmulationProfile(name=name, **settings) for name, settings in config["profiles"].items()}
+    return profiles, config.get("budgets", {})
+
+
+def selected_profiles(config, marker, available: Sequence[str]) -> List[str]:
+    """
+    Resolve which profiles a test runs under.
+
+    The emulation marker lists the profiles a test runs under and --emulation selects
+    profiles for the whole run; when both are given their intersection is used.
+
+    Args:
+        config: Pytest config object
+        marker: The test's emulation marker, or None
+        available: Profile names defined in the config
+
+    Returns:
+        Profile names; empty when the test runs without emulation
+    """
+    option = config.getoption("--emulation")
+    requested = [name.strip() for name in option.split(",") if name.strip()] if option else []
+    unknown = set(requested) - set(available)
+    if unknown:
+        raise pytest.UsageError(f"Unknown emulation profiles: {', '.join(sorted(unknown))}")
+    if marker is None or not marker.args:
+        return requested
+    unknown = set(marker.args) - set(available)
+    if unknown:
+        raise pytest.UsageError(f"Unknown emulation profiles in marker: {', '.join(sorted(unknown))}")
+    if not requested:
+        return list(marker.args)
+    return [name for name in marker.args if name in requested]
+
+
+class FlowTimer:
+    """Measures user flows of one test under its emulation profile."""
+
+    def __init__(self, plugin: "EmulationPlugin", nodeid: str, profile: Optional[EmulationProfile]):
+        """
+        Initialize the flow timer.
+
+        Args:
+            plugin: Plugin collecting timings for the summary
+            nodeid: Test being measured
+            profile: Profile the test runs under, or None
+        """
+        self.plugin = plugin
+        self.nodeid = nodeid
+        self.profile_name = profile.name if profile else UNEMULATED
+
+    @property
+    def budgets(self) -> Dict[str, float]:
+        """Budgets in milliseconds of every flow under the current profile."""
+        return {flow: limits[self.profile_name] for flow, limits in self.plugin.budgets.items()
+                if self.profile_name in limits}
+
+    @asynccontextmanager
+    async def measure(self, flow: str, page=None) -> AsyncIterator[None]:
+        """
+        Time a flow and fail the test if it exceeds the profile's budget.
+
+        Args:
+            flow: Flow name, matching a key of "budgets" in the config
+            page: Page whose navigation timing is recorded with the flow, if given
+
+        Yields:
+            Nothing; the block is the measured flow
+
+        Raises:
+            AssertionError: If the flow took longer than its budget
+        """
+        started = time.perf_counter()
+        yield
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        navigation = await page.evaluate(NAVIGATION_TIMING_SCRIPT) if page is not None else None
+        budget = self.budgets.get(flow)
+        self.plugin.record(self.nodeid, flow, self.profile_name, elapsed_ms, budget, navigation)
+        if budget is not None and elapsed_ms > budget:
+            raise AssertionError(
+                f"{flow} took {elapsed_ms:.0f}ms under {self.profile_name}, budget is {budget:.0f}ms"
+            )
+
+
+class EmulationPlugin:
+    """Pytest plugin parametrizing tests by profile and reporting flow timings."""
+
+    def __init__(self, config, profiles: Dict[str, EmulationProfile], budgets: Dict[str, Dict[str, float]]):
+        """
+        Initialize the plugin.
+
+        Args:
+            config: Pytest config object
+            profiles: Profiles keyed by name
+            budgets: Budgets in milliseconds keyed by flow and profile
+        """
+        self.config = config
+        self.profiles = profiles
+        self.budgets = budgets
+        # (flow, profile) -> [runs, total ms, max ms, over budget]
+        self.timings: Dict[Tuple[str, str], List[float]] = {}
+        self._contexts: Dict[object, EmulationProfile] = {}
+        self._pages: Dict[object, asyncio.Future] = {}
+
+    def pytest_generate_tests(self, metafunc):
+        if "emulation_profile" not in metafunc.fixturenames:
+            return
+        names = selected_profiles(self.config, metafunc.definition.get_closest_marker("emulation"),
+                                  list(self.profiles))
+        if names:
+            metafunc.parametrize("emulation_profile", names, indirect=True, ids=names)
+
+    def attach(self, context, profile: Optional[EmulationProfile]) -> None:
+        """
+        Apply a profile to every page opened in a context, including popups.
+
+        Args:
+            context: Playwright BrowserContext created with the profile's context options
+            profile: Profile of the test, or None
+        """
+        if profile is None:
+            return
+        self._contexts[context] = profile
+        context.on("close", lambda _: self._contexts.pop(context, None))
+
+        async def on_page(page):
+            await self.apply_page(context, page)
+
+        context.on("page", on_page)
+
+    async def apply_page(self, context, page) -> None:
+        """
+        Apply the context's profile to a page; returns once throttling is active.
+
+        Args:
+            context: Playwright BrowserContext owning the page
+            page: Playwright Page object
+        """
+        profile = self._contexts.get(context)
+        if profile is None:
+            return
+        applying = self._pages.get(page)
+        if applying is None:
+            applying = asyncio.ensure_future(profile.apply(context, page))
+            self._pages[page] = applying
+            page.on("close", lambda _: self._pages.pop(page, None))
+        await asyncio.shield(applying)
+
+    def record(self, nodeid: str, flow: str, profile: str, elapsed_ms: float,
+               budget: Optional[float], navigation: Optional[dict]) -> None:
+        """
+        Add a flow timing to the summary and the result stream.
+
+        Args:
+            nodeid: Test that ran the flow
+            flow: Flow name
+            profile: Profile name
+            elapsed_ms: Duration of the flow
+            budget: Budget of the flow under the profile, if any
+            navigation: Navigation timing of the page, if recorded
+        """
+        stats = self.timings.setdefault((flow, profile), [0, 0.0, 0.0, 0])
+        stats[0] += 1
+        stats[1] += elapsed_ms
+        stats[2] = max(stats[2], elapsed_ms)
+        stats[3] += budget is not None and elapsed_ms > budget
+        reporter = get_stream_reporter(self.config)
+        if reporter is not None:
+            reporter.emit({"event": "flow_timing", "time": time.time(), "nodeid": nodeid, "flow": flow,
+                           "profile": profile, "elapsed_ms": elapsed_ms, "budget_ms": budget,
+                           "navigation": navigation})
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if not self.timings:
+            return
+        terminalreporter.section("flow timings by emulation profile")
+        write = terminalreporter.write_line
+        write(f"  {'flow':<16} {'profile':<16} {'runs':>5} {'mean ms':>9} {'max ms':>9} {'budget':>9} {'over':>5}")
+        for (flow, profile), (runs, total, longest, over) in sorted(self.timings.items()):
+            budget = self.budgets.get(flow, {}).get(profile)
+            budget_text = f"{budget:.0f}" if budget is not None else "-"
+            write(f"  {flow:<16} {profile:<16} {runs:5d} {total / runs:9.0f} {longest:9.0f} "
+                  f"{budget_text:>9} {over:5d}")
+
+
+def pytest_addoption(parser):
+    """Register emulation command line options."""
+    group = parser.getgroup("emulation", "network and CPU emulation")
+    group.addoption(
+        "--emulation",
+        default=None,
+        metavar="PROFILES",
+        help="Comma separated emulation profiles to run tests under (default: the test's emulation marker)",
+    )
+    group.addoption(
+        "--emulation-config",
+        default=DEFAULT_CONFIG_PATH,
+        help="Path to the emulation profiles JSON config",
+    )
+
+
+def pytest_configure(config):
+    """Register the emulation plugin so tests are parametrized by profile."""
+    profiles, budgets = load_emulation_config(config.getoption("--emulation-config"))
+    config.pluginmanager.register(EmulationPlugin(config, profiles, budgets), "emulation")
+
+
+@pytest.fixture(scope="session")
+def emulation(request) -> EmulationPlugin:
+    """The session's emulation plugin."""
+    return request.config.pluginmanager.get_plugin("emulation")
+
+
+@pytest.fixture
+def emulation_profile(request, emulation) -> Optional[EmulationProfile]:
+    """Profile the test runs under, or None without emulation."""
+    name = getattr(request, "param", None)
+    return emulation.profiles[name] if name else None
+
+
+@pytest.fixture
+def flow_timer(request, emulation, emulation_profile) -> FlowTimer:
+    """Times user flows and checks them against the current profile's budgets."""
+    return FlowTimer(emulation, request.node.nodeid, emulation_profile)
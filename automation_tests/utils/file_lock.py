@@ -0,0 +1,81 @@
+"""
+File Lock
+This module provides the cross-process lock guarding state files shared by the workers on a
+machine, such as the account lease state and the asset cache index. The lock is held on an
+open lock file through the operating system, so it is released when its holder exits or is
+killed and there are no stale lock files to break.
+"""
+
+import asyncio
+import os
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+RETRY_INTERVAL = 0.01
+
+
+class FileLock:
+    """Exclusive lock on a file, usable with "with" and "async with"."""
+
+    def __init__(self, path: str):
+        """
+        Initialize the lock; the lock file is created on first use and never removed.
+
+        Args:
+            path: Path of the lock file
+        """
+        self.path = path
+        self._fd = None
+
+    def try_acquire(self) -> bool:
+        """
+        Take the lock if no other holder has it.
+
+        Returns:
+            True if the lock is now held
+        """
+        fd = os.open(self.path, os.O_CREAT | os.O_RDWR)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def release(self) -> None:
+        """Release the lock."""
+        fd, self._fd = self._fd, None
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
+
+    def __enter__(self) -> "FileLock":
+        while not self.try_acquire():
+            time.sleep(RETRY_INTERVAL)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+    async def __aenter__(self) -> "FileLock":
+        while not self.try_acquire():
+            await asyncio.sleep(RETRY_INTERVAL)
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.release()
@@ -0,0 +1,650 @@
+"""
+Impact-Based Test Selection
+This module maps each test to the page-object methods, selector constants, fixtures and
+helper modules it exercises, using static analysis plus optional runtime tracing. With
+--changed-only, only tests affected by a git diff are run.
+"""
+
+import ast
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import pytest
+
+
+DEFAULT_INDEX_PATH = ".impact-index.json"
+RUN_ALL = "*"
+
+# Source directories whose symbols are tracked
+PAGE_DIR = "pages"
+HELPER_DIRS = ("utils",)
+TEST_DIR = "tests"
+SNAPSHOT_DIR = "snapshots"
+
+# Changes to these files never affect test outcomes
+IGNORED_FILES = re.compile(r"(\.md$|^\.gitignore$|^\.env\.example$|^" + re.escape(DEFAULT_INDEX_PATH) + "$)")
+
+# Untracked files only count when they are sources, settings or snapshot baselines, so
+# reports and profiles written into the tree don't force full runs
+UNTRACKED_SOURCE_SUFFIXES = (".py", ".ini", ".cfg", ".toml", ".json", ".txt", ".yml", ".yaml")
+
+MIN_SELECTOR_LENGTH = 4
+_HUNK = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
+
+
+def _rel(path: str, rootdir: str) -> str:
+    return os.path.relpath(path, rootdir).replace(os.sep, "/")
+
+
+def _parse(path: str) -> Optional[ast.Module]:
+    try:
+        with open(path, encoding="utf-8") as handle:
+            return ast.parse(handle.read(), filename=path)
+    except (OSError, SyntaxError):
+        return None
+
+
+def _class_constants(tree: ast.Module, rel: str) -> Dict[str, str]:
+    """Map "path::Class.NAME" to the value of every string constant of a module's classes."""
+    constants = {}
+    for cls in (n for n in tree.body if isinstance(n, ast.ClassDef)):
+        for node in cls.body:
+            if isinstance(node, ast.Assign) and isinstance(node.value, ast.Constant) \
+                    and isinstance(node.value.value, str):
+                for target in node.targets:
+                    if isinstance(target, ast.Name):
+                        constants[f"{rel}::{cls.name}.{target.id}"] = node.value.value
+    return constants
+
+
+def _is_fixture(node: ast.AST) -> bool:
+    for decorator in getattr(node, "decorator_list", []):
+        target = decorator.func if isinstance(decorator, ast.Call) else decorator
+        if isinstance(target, ast.Attribute) and target.attr == "fixture":
+            return True
+        if isinstance(target, ast.Name) and target.id == "fixture":
+            return True
+    return False
+
+
+def _enclosing(tree: ast.Module, line: int) -> List[ast.AST]:
+    """
+    Find the chain of class and function definitions containing a line.
+
+    Args:
+        tree: Parsed module
+        line: 1-based line number in the current file
+
+    Returns:
+        Definitions from outermost to innermost; empty for module-level code
+    """
+    chain: List[ast.AST] = []
+    body = tree.body
+    while True:
+        for node in body:
+            start = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+            if start <= line <= getattr(node, "end_lineno", node.lineno):
+                if isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+                    chain.append(node)
+                    body = node.body
+                    break
+                if chain and isinstance(chain[-1], ast.ClassDef):
+                    chain.append(node)
+                return chain
+        else:
+            return chain
+
+
+class PageObjectIndex:
+    """Selector constants and methods of the page-object modules."""
+
+    def __init__(self, rootdir: str):
+        """
+        Parse every page-object module.
+
+        Args:
+            rootdir: Test suite root directory
+        """
+        self.rootdir = rootdir
+        self.constants: Dict[str, str] = {}
+        self.members: Dict[str, Dict[str, str]] = defaultdict(dict)
+        self.closure: Dict[str, Set[str]] = {}
+        self.modules: Dict[str, str] = {}
+        page_dir = os.path.join(rootdir, PAGE_DIR)
+        if os.path.isdir(page_dir):
+            for name in sorted(os.listdir(page_dir)):
+                if name.endswith(".py"):
+                    self._index_module(os.path.join(page_dir, name))
+
+    def _index_module(self, path: str) -> None:
+        tree = _parse(path)
+        if tree is None:
+            return
+        rel = _rel(path, self.rootdir)
+        self.modules[os.path.splitext(rel)[0].replace("/", ".")] = rel
+        calls: Dict[str, Set[str]] = {}
+        for cls in (n for n in tree.body if isinstance(n, ast.ClassDef)):
+            for node in cls.body:
+                if isinstance(node, ast.Assign) and isinstance(node.value, ast.Constant) \
+                        and isinstance(node.value.value, str):
+                    for target in node.targets:
+                        if isinstance(target, ast.Name):
+                            symbol = f"{rel}::{cls.name}.{target.id}"
+                            self.members[cls.name][target.id] = symbol
+                            self.constants[symbol] = node.value.value
+                elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    symbol = f"{rel}::{cls.name}.{node.name}"
+                    self.members[cls.name][node.name] = symbol
+                    calls[symbol] = {
+                        n.attr for n in ast.walk(node)
+                        if isinstance(n, ast.Attribute) and isinstance(n.value, ast.Name) and n.value.id == "self"
+                    }
+            # Methods depend on the constants and methods they reach through self
+            for symbol, attributes in calls.items():
+                if symbol.startswith(f"{rel}::{cls.name}."):
+                    calls[symbol] = {self.members[cls.name][a] for a in attributes if a in self.members[cls.name]}
+        for symbol in calls:
+            seen, stack = set(), [symbol]
+            while stack:
+                current = stack.pop()
+                if current in seen:
+                    continue
+                seen.add(current)
+                stack.extend(calls.get(current, ()))
+            self.closure[symbol] = seen
+
+    def expand(self, symbols: Iterable[str]) -> Set[str]:
+        """Add everything reachable from page-object methods to a symbol set."""
+        expanded = set()
+        for symbol in symbols:
+            expanded |= self.closure.get(symbol, {symbol})
+        return expanded
+
+
+class DependencyIndex:
+    """Maps tests to the symbols they depend on."""
+
+    def __init__(self, rootdir: str, index_path: Optional[str] = None):
+        """
+        Build the static part of the index and load recorded runtime traces.
+
+        Args:
+            rootdir: Test suite root directory
+            index_path: JSON file holding runtime traces
+        """
+        self.rootdir = rootdir
+        self.index_path = index_path or os.path.join(rootdir, DEFAULT_INDEX_PATH)
+        self.pages = PageObjectIndex(rootdir)
+        self.fixture_modules = self._index_fixtures()
+        self.traced: Dict[str, Set[str]] = defaultdict(set)
+        self._static: Dict[str, Dict[str, Set[str]]] = {}
+        # Earlier values of changed selector constants, still hard-coded by some tests
+        self.base_constants: Dict[str, str] = {}
+        try:
+            with open(self.index_path, encoding="utf-8") as handle:
+                for nodeid, symbols in json.load(handle).get("tests", {}).items():
+                    self.traced[nodeid] = set(symbols)
+        except (OSError, ValueError):
+            pass
+
+    def _index_fixtures(self) -> Dict[str, str]:
+        """Map fixture names to the module defining them."""
+        paths = [os.path.join(self.rootdir, "conftest.py")]
+        for directory in HELPER_DIRS:
+            full = os.path.join(self.rootdir, directory)
+            if os.path.isdir(full):
+                paths += [os.path.join(full, n) for n in sorted(os.listdir(full)) if n.endswith(".py")]
+        modules = {}
+        for path in paths:
+            tree = _parse(path)
+            for node in (tree.body if tree else []):
+                if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and _is_fixture(node):
+                    modules[node.name] = _rel(path, self.rootdir)
+        return modules
+
+    def add_base_constants(self, constants: Dict[str, str]) -> None:
+        """
+        Also match tests against earlier values of selector constants.
+
+        Args:
+            constants: Values at the base revision keyed by symbol, see base_constants()
+        """
+        self.base_constants.update(constants)
+        self._static.clear()
+
+    def _static_module(self, path: str) -> Dict[str, Set[str]]:
+        """
+        Analyse one test module.
+
+        Returns:
+            Symbols per test function, keyed by "Class::test" or "test"
+        """
+        rel = _rel(path, self.rootdir)
+        if rel in self._static:
+            return self._static[rel]
+        tree = _parse(path)
+        result: Dict[str, Set[str]] = {}
+        if tree is None:
+            self._static[rel] = result
+            return result
+
+        imported_modules = set()
+        page_classes = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.ImportFrom) and node.module:
+                module_path = node.module.replace(".", "/") + ".py"
+                if os.path.exists(os.path.join(self.rootdir, module_path)):
+                    imported_modules.add(f"module:{module_path}")
+                page_classes |= {alias.name for alias in node.names if alias.name in self.pages.members}
+
+        def analyse(function: ast.AST) -> Set[str]:
+            symbols = set(imported_modules)
+            for node in ast.walk(function):
+                if isinstance(node, ast.Constant) and isinstance(node.value, str) \
+                        and len(node.value) >= MIN_SELECTOR_LENGTH:
+                    # Tests often inline the same selector strings the page objects define
+                    for constants in (self.pages.constants, self.base_constants):
+                        symbols |= {s for s, v in constants.items()
+                                    if len(v) >= MIN_SELECTOR_LENGTH and v in node.value}
+                elif isinstance(node, ast.Attribute):
+                    for cls in page_classes:
+                        if node.attr in self.pages.members[cls]:
+                            symbols.add(self.pages.members[cls][node.attr])
+            return self.pages.expand(symbols)
+
+        for node in tree.body:
+            if isinstance(node, ast.ClassDef):
+                for member in node.body:
+                    if isinstance(member, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                        result[f"{node.name}::{member.name}"] = analyse(member)
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                result[node.name] = analyse(node)
+        self._static[rel] = result
+        return result
+
+    def dependencies(self, item) -> Set[str]:
+        """
+        Collect every symbol a collected test depends on.
+
+        Args:
+            item: Pytest test item
+
+        Returns:
+            Symbols of page objects, fixtures and helper modules
+        """
+        module_path, _, rest = item.nodeid.partition("::")
+        key = re.sub(r"\[.*\]$", "", rest)
+        symbols = set(self._static_module(os.path.join(self.rootdir, module_path)).get(key, ()))
+        symbols |= self.traced.get(item.nodeid, set())
+        for fixture in getattr(item, "fixturenames", ()):
+            symbols.add(f"fixture:{fixture}")
+            if fixture in self.fixture_modules:
+                symbols.add(f"module:{self.fixture_modules[fixture]}")
+        symbols |= {f"module:{s.split('::', 1)[0]}" for s in list(symbols) if "::" in s}
+        return symbols
+
+    def record_trace(self, nodeid: str, symbols: Set[str]) -> None:
+        """Store the symbols a test executed at runtime."""
+        self.traced[nodeid] = set(symbols)
+
+    def save(self) -> None:
+        """Write the runtime traces to the index file."""
+        payload = {"version": 1, "tests": {k: sorted(v) for k, v in sorted(self.traced.items())}}
+        temp_path = f"{self.index_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as handle:
+            json.dump(payload, handle, indent=1)
+        os.replace(temp_path, self.index_path)
+
+
+def _git(rootdir: str, *args: str) -> str:
+    return subprocess.run(
+        ["git", *args], cwd=rootdir, check=True, capture_output=True, text=True
+    ).stdout
+
+
+def resolve_base(rootdir: str, base: str) -> str:
+    """
+    Resolve the comparison base to a commit, accepting CI branch names like refs/heads/main.
+
+    Args:
+        rootdir: Directory inside the git work tree
+        base: Revision, branch name or refs/heads/<branch>
+
+    Returns:
+        Merge base of the revision and HEAD
+    """
+    name = base[len("refs/heads/"):] if base.startswith("refs/heads/") else base
+    for candidate in (base, name, f"origin/{name}"):
+        try:
+            _git(rootdir, "rev-parse", "--verify", "--quiet", f"{candidate}^{{commit}}")
+        except subprocess.CalledProcessError:
+            continue
+        return _git(rootdir, "merge-base", candidate, "HEAD").strip()
+    raise ValueError(f"cannot resolve git revision '{base}'")
+
+
+def changed_lines(rootdir: str, base: str) -> Dict[str, Optional[Set[int]]]:
+    """
+    List changed files and line numbers between a base revision and the working tree.
+
+    Args:
+        rootdir: Test suite root directory
+        base: Revision to compare against
+
+    Returns:
+        Changed line numbers per path relative to rootdir; None means the whole file
+        (new, deleted or untracked)
+    """
+    commit = resolve_base(rootdir, base)
+    changes: Dict[str, Optional[Set[int]]] = {}
+    current: Optional[str] = None
+    for line in _git(rootdir, "diff", "--relative", "--unified=0", "--no-color", commit, "--").splitlines():
+        if line.startswith("--- "):
+            current = None if line == "--- /dev/null" else line[len("--- a/"):]
+            if current is not None:
+                changes.setdefault(current, set())
+        elif line.startswith("+++ "):
+            if line == "+++ /dev/null":
+                if current is not None:
+                    changes[current] = None
+                current = None
+            else:
+                old = current
+                current = line[len("+++ b/"):]
+                if old is None:
+                    changes[current] = None
+                elif old != current:
+                    changes[old] = None
+                    changes[current] = None
+                else:
+                    changes.setdefault(current, set())
+        elif current is not None and changes.get(current) is not None:
+            match = _HUNK.match(line)
+            if match:
+                start, count = int(match.group(1)), int(match.group(2) or 1)
+                # Pure deletions are attributed to the line they were removed at
+                changes[current].update(range(start, start + max(count, 1)))
+    for path in _git(rootdir, "ls-files", "--others", "--exclude-standard").splitlines():
+        is_baseline = path.startswith(f"{SNAPSHOT_DIR}/") and path.endswith(".png") and "/failures/" not in path
+        if path.endswith(UNTRACKED_SOURCE_SUFFIXES) or is_baseline:
+            changes[path] = None
+    return changes
+
+
+def base_constants(rootdir: str, base: str, changes: Dict[str, Optional[Set[int]]]) -> Dict[str, str]:
+    """
+    Read the base-revision values of page-object constants that changed or were removed.
+
+    A test hard-coding a selector keeps the old value after the page object is updated,
+    so it is only matched through the value the constant had at the base revision.
+
+    Args:
+        rootdir: Test suite root directory
+        base: Revision to compare against
+        changes: Output of changed_lines()
+
+    Returns:
+        Base-revision values keyed by symbol, for constants whose value differs now
+    """
+    commit = resolve_base(rootdir, base)
+    previous: Dict[str, str] = {}
+    for path in changes:
+        if path.split("/", 1)[0] != PAGE_DIR or not path.endswith(".py"):
+            continue
+        try:
+            # "./" makes the path relative to rootdir rather than to the top of the work tree
+            source = _git(rootdir, "show", f"{commit}:./{path}")
+            tree = ast.parse(source, filename=path)
+        except (subprocess.CalledProcessError, SyntaxError):
+            continue
+        full = os.path.join(rootdir, path)
+        current_tree = _parse(full) if os.path.exists(full) else None
+        current = _class_constants(current_tree, path) if current_tree else {}
+        previous.update({symbol: value for symbol, value in _class_constants(tree, path).items()
+                         if current.get(symbol) != value})
+    return previous
+
+
+def plugin_modules(rootdir: str) -> Set[str]:
+    """
+    List the modules conftest.py loads through pytest_plugins.
+
+    Args:
+        rootdir: Test suite root directory
+
+    Returns:
+        Paths of the plugin modules relative to rootdir
+    """
+    tree = _parse(os.path.join(rootdir, "conftest.py"))
+    modules = set()
+    for node in (tree.body if tree else []):
+        if isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == "pytest_plugins"
+                                                for t in node.targets):
+            for value in ast.walk(node.value):
+                if isinstance(value, ast.Constant) and isinstance(value.value, str):
+                    modules.add(value.value.replace(".", "/") + ".py")
+    return modules
+
+
+def _defines_hooks(node: ast.AST) -> bool:
+    return isinstance(node, ast.ClassDef) and any(
+        isinstance(member, (ast.FunctionDef, ast.AsyncFunctionDef)) and member.name.startswith("pytest_")
+        for member in node.body
+    )
+
+
+def changed_symbols(rootdir: str, changes: Dict[str, Optional[Set[int]]]) -> Tuple[Set[str], Set[str]]:
+    """
+    Map changed lines to symbols and test node id prefixes.
+
+    Args:
+        rootdir: Test suite root directory
+        changes: Output of changed_lines()
+
+    Returns:
+        Tuple of changed symbols (RUN_ALL when anything unmapped changed) and changed
+        test node id prefixes
+    """
+    symbols: Set[str] = set()
+    tests: Set[str] = set()
+    plugins = plugin_modules(rootdir)
+    for path, lines in changes.items():
+        if IGNORED_FILES.search(path):
+            continue
+        full = os.path.join(rootdir, path)
+        top = path.split("/", 1)[0]
+
+        if top == SNAPSHOT_DIR:
+            parts = path.split("/")
+            if len(parts) >= 3:
+                tests.add(f"{TEST_DIR}/{parts[2]}.py::")
+            continue
+        if not path.endswith(".py"):
+            symbols.add(RUN_ALL)
+            continue
+        tree = _parse(full) if os.path.exists(full) else None
+
+        if top == TEST_DIR and os.path.basename(path).startswith("test_"):
+            if tree is None or lines is None:
+                tests.add(f"{path}::")
+                continue
+            for line in lines:
+                chain = [n for n in _enclosing(tree, line) if isinstance(n, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef))]
+                if not chain:
+                    tests.add(f"{path}::")
+                elif len(chain) == 1 and isinstance(chain[0], ast.ClassDef):
+                    tests.add(f"{path}::{chain[0].name}::")
+                else:
+                    depth = 2 if isinstance(chain[0], ast.ClassDef) else 1
+                    tests.add(f"{path}::" + "::".join(n.name for n in chain[:depth]))
+            continue
+
+        if path in plugins:
+            # Plugins shape every test through their hooks, whether or not a test uses their fixtures
+            symbols.add(RUN_ALL)
+            continue
+        if tree is None or lines is None:
+            symbols.add(f"module:{path}" if top == PAGE_DIR or top in HELPER_DIRS else RUN_ALL)
+            continue
+        for line in lines:
+            chain = _enclosing(tree, line)
+            if top == PAGE_DIR:
+                if len(chain) >= 2 and isinstance(chain[0], ast.ClassDef):
+                    member = chain[1]
+                    names = [member.name] if hasattr(member, "name") else [
+                        t.id for t in getattr(member, "targets", []) if isinstance(t, ast.Name)
+                    ]
+                    symbols |= {f"{path}::{chain[0].name}.{name}" for name in names}
+                    if not names:
+                        symbols.add(f"module:{path}")
+                else:
+                    symbols.add(f"module:{path}")
+            elif path == "conftest.py" or top in HELPER_DIRS:
+                outer = chain[0] if chain else None
+                if outer is None or outer.name.startswith("pytest_") or _defines_hooks(outer):
+                    # Hooks, plugin classes and module-level code can affect any test
+                    symbols.add(RUN_ALL)
+                elif _is_fixture(outer):
+                    symbols.add(f"fixture:{outer.name}")
+                else:
+                    symbols.add(f"module:{path}")
+                    qualname = ".".join(n.name for n in chain if hasattr(n, "name"))
+                    symbols.add(f"{path}::{qualname}")
+            else:
+                symbols.add(RUN_ALL)
+    return symbols, tests
+
+
+class RuntimeTracer:
+    """Records which page-object and helper functions each test executes."""
+
+    def __init__(self, rootdir: str):
+        """
+        Initialize the tracer.
+
+        Args:
+            rootdir: Test suite root directory
+        """
+        self.prefixes = tuple(os.path.join(rootdir, d) + os.sep for d in (PAGE_DIR,) + HELPER_DIRS)
+        self.rootdir = rootdir
+        self.symbols: Set[str] = set()
+        self._seen_codes = {}
+
+    def _profile(self, frame, event, arg):
+        if event != "call":
+            return
+        code = frame.f_code
+        symbol = self._seen_codes.get(code)
+        if symbol is None:
+            filename = os.path.abspath(code.co_filename)
+            if not filename.startswith(self.prefixes):
+                self._seen_codes[code] = ""
+                return
+            qualname = getattr(code, "co_qualname", code.co_name)
+            symbol = f"{_rel(filename, self.rootdir)}::{qualname}"
+            self._seen_codes[code] = symbol
+        if symbol:
+            self.symbols.add(symbol)
+
+    def start(self) -> None:
+        """Begin recording calls for a test."""
+        self.symbols = set()
+        sys.setprofile(self._profile)
+
+    def stop(self) -> Set[str]:
+        """Stop recording and return the symbols executed."""
+        sys.setprofile(None)
+        return self.symbols
+
+
+class ImpactSelector:
+    """Pytest plugin that records runtime traces and deselects unaffected tests."""
+
+    def __init__(self, config):
+        self.config = config
+        self.rootdir = str(config.rootpath)
+        self.index = DependencyIndex(self.rootdir, config.getoption("--impact-index"))
+        self.base = config.getoption("--changed-only")
+        self.tracer = RuntimeTracer(self.rootdir) if config.getoption("--impact-trace") else None
+        self.summary: Optional[str] = None
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_collection_modifyitems(self, session, config, items):
+        if not self.base:
+            return
+        try:
+            changes = changed_lines(self.rootdir, self.base)
+            symbols, tests = changed_symbols(self.rootdir, changes)
+            self.index.add_base_constants(base_constants(self.rootdir, self.base, changes))
+        except (ValueError, OSError, subprocess.CalledProcessError) as error:
+            self.summary = f"impact selection disabled ({error}); running all tests"
+            return
+        if RUN_ALL in symbols:
+            self.summary = f"impact selection: shared code changed since {self.base}; running all tests"
+            return
+
+        selected, deselected = [], []
+        for item in items:
+            nodeid = re.sub(r"\[.*\]$", "", item.nodeid)
+            affected = any(nodeid == t or nodeid.startswith(t) and t.endswith("::") for t in tests)
+            if affected or self.index.dependencies(item) & symbols:
+                selected.append(item)
+            else:
+                deselected.append(item)
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+            items[:] = selected
+        self.summary = f"impact selection: {len(selected)} of {len(selected) + len(deselected)} tests affected by changes since {self.base}"
+
+    def pytest_report_collectionfinish(self, config, items):
+        return self.summary
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        if self.tracer is None:
+            yield
+            return
+        self.tracer.start()
+        try:
+            yield
+        finally:
+            self.index.record_trace(item.nodeid, self.tracer.stop())
+
+    def pytest_sessionfinish(self, session):
+        if self.tracer is not None:
+            self.index.save()
+
+
+def pytest_addoption(parser):
+    """Register impact selection command line options."""
+    group = parser.getgroup("impact", "impact-based test selection")
+    group.addoption(
+        "--changed-only",
+        nargs="?",
+        const="HEAD",
+        default=None,
+        metavar="BASE",
+        help="Run only tests affected by changes since BASE (default: HEAD, i.e. uncommitted changes)",
+    )
+    group.addoption(
+        "--impact-trace",
+        action="store_true",
+        default=False,
+        help="Record the page-object and helper functions each test executes into the impact index",
+    )
+    group.addoption(
+        "--impact-index",
+        default=None,
+        help=f"Path of the impact index file (default: <rootdir>/{DEFAULT_INDEX_PATH})",
+    )
+
+
+def pytest_configure(config):
+    """Register the impact selector when selection or tracing is requested."""
+    if config.getoption("--changed-only") or config.getoption("--impact-trace"):
+        config.pluginmanager.register(ImpactSelector(config), "impact_selector")
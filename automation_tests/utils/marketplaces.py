@@ -0,0 +1,436 @@
+"""
+Marketplace Fan-out
+This module runs one test body against several Amazon marketplaces concurrently. Tests
+using the marketplaces fixture are parametrized by marketplace, so each marketplace passes
+or fails on its own; the first variant of a test starts the body on every selected
+marketplace at once. Each marketplace has its own pool of browser contexts configured with
+locale, timezone, geolocation and currency. Marketplace URLs and selectors come from
+config/marketplaces.json.
+"""
+
+import asyncio
+import json
+import os
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Set, Tuple
+from urllib.parse import urlsplit
+
+import pytest
+
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                   "config", "marketplaces.json")
+DEFAULT_POOL_SIZE = 1
+
+# Storage.clearDataForOrigin types; cookies are reset separately to the marketplace defaults
+CLEARED_STORAGE = "local_storage,indexeddb,websql,cache_storage,service_workers,file_systems"
+
+
+def origin_of(url: str) -> str:
+    """Scheme, host and port of a URL."""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+@dataclass(frozen=True)
+class Marketplace:
+    """Settings of one Amazon marketplace."""
+
+    code: str
+    name: str
+    base_url: str
+    locale: str
+    timezone_id: str
+    geolocation: Dict[str, float]
+    currency: str
+    currency_symbol: str
+    cookie_domain: str
+    paths: Dict[str, str] = field(default_factory=dict)
+    selectors: Dict[str, str] = field(default_factory=dict)
+
+    def url(self, path: str = "") -> str:
+        """
+        Build a URL on this marketplace.
+
+        Args:
+            path: Key from the marketplace's paths, or a literal path
+
+        Returns:
+            Absolute URL
+        """
+        return self.base_url + self.paths.get(path, path)
+
+    def selector(self, name: str) -> str:
+        """
+        Get a selector, preferring the marketplace-specific override.
+
+        Args:
+            name: Selector name from the config
+
+        Returns:
+            CSS selector
+        """
+        return self.selectors[name]
+
+    def context_options(self) -> dict:
+        """Keyword arguments for browser.new_context()."""
+        return {
+            "locale": self.locale,
+            "timezone_id": self.timezone_id,
+            "geolocation": self.geolocation,
+            "permissions": ["geolocation"],
+        }
+
+    def cookies(self) -> List[dict]:
+        """Cookies that select the marketplace currency."""
+        return [{
+            "name": "i18n-prefs",
+            "value": self.currency,
+            "domain": self.cookie_domain,
+            "path": "/",
+        }]
+
+
+@lru_cache(maxsize=None)
+def load_marketplaces(path: str = DEFAULT_CONFIG_PATH) -> Dict[str, Marketplace]:
+    """
+    Load the marketplace config once per process.
+
+    Args:
+        path: Path to the marketplaces JSON file
+
+    Returns:
+        Marketplaces keyed by code
+    """
+    with open(path, encoding="utf-8") as handle:
+        config = json.load(handle)
+    default_selectors = config.get("default_selectors", {})
+    marketplaces = {}
+    for code, settings in config["marketplaces"].items():
+        settings = dict(settings)
+        settings["selectors"] = {**default_selectors, **settings.get("selectors", {})}
+        marketplaces[code] = Marketplace(code=code, **settings)
+    return marketplaces
+
+
+class ContextPool:
+    """Pool of reusable browser contexts for one marketplace."""
+
+    def __init__(self, browser_manager, marketplace: Marketplace, max_size: int = DEFAULT_POOL_SIZE,
+                 asset_cache=None):
+        """
+        Initialize the context pool.
+
+        Args:
+            browser_manager: Manager owning the session browser
+            marketplace: Marketplace the contexts are configured for
+            max_size: Maximum number of contexts kept open
+            asset_cache: Shared asset cache serving the contexts' static assets, if any
+        """
+        self.browser_manager = browser_manager
+        self.marketplace = marketplace
+        self.max_size = max_size
+        self.asset_cache = asset_cache
+        self._idle: List = []
+        self._all: List = []
+        self._origins: Dict[object, Set[str]] = {}
+        self._available = asyncio.Semaphore(max_size)
+
+    async def _create(self):
+        options = self.marketplace.context_options()
+        if self.asset_cache is not None:
+            options.update(self.asset_cache.context_options())
+        context = await self.browser_manager.browser.new_context(**options)
+        if self.asset_cache is not None:
+            await self.asset_cache.attach(context)
+        await context.add_cookies(self.marketplace.cookies())
+        # Origins whose documents loaded in the context hold its storage
+        origins = self._origins[context] = set()
+
+        def on_request(request):
+            if request.resource_type == "document" and request.url.startswith("http"):
+                origins.add(origin_of(request.url))
+
+        context.on("request", on_request)
+        self._all.append(context)
+        return context
+
+    async def _clear_storage(self, context) -> None:
+        """Delete local storage, IndexedDB, caches and service workers of visited origins."""
+        origins = self._origins.get(context)
+        if not origins:
+            return
+        page = context.pages[0] if context.pages else await context.new_page()
+        session = await context.new_cdp_session(page)
+        for origin in sorted(origins):
+            await session.send("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": CLEARED_STORAGE})
+        await session.detach()
+        origins.clear()
+
+    async def acquire(self):
+        """
+        Take a context from the pool, creating one if none is idle.
+
+        Returns:
+            Playwright BrowserContext object
+        """
+        await self._available.acquire()
+        try:
+            return self._idle.pop() if self._idle else await self._create()
+        except BaseException:
+            self._available.release()
+            raise
+
+    async def release(self, context) -> None:
+        """
+        Reset a context and return it to the pool.
+
+        Storage of the origins the context visited is deleted, cookies are reset to the
+        marketplace defaults and open pages are closed (which discards session storage),
+        so the next test starts without the previous test's session. A context that
+        can't be reset is closed instead.
+
+        Args:
+            context: Context obtained from acquire()
+        """
+        try:
+            await self._clear_storage(context)
+            for page in list(context.pages):
+                await page.close()
+            await context.clear_cookies()
+            await context.add_cookies(self.marketplace.cookies())
+            self._idle.append(context)
+        except Exception:
+            # A broken context is dropped; the next acquire creates a fresh one
+            if context in self._all:
+                self._all.remove(context)
+            self._origins.pop(context, None)
+            try:
+                await context.close()
+            except Exception:
+                pass
+        finally:
+            self._available.release()
+
+    async def close(self) -> None:
+        """Close every context created by the pool."""
+        for context in self._all:
+            try:
+                await context.close()
+            except Exception:
+                pass
+        self._all.clear()
+        self._idle.clear()
+        self._origins.clear()
+
+
+class MarketplaceScheduler:
+    """Runs the marketplace variants of a test concurrently and hands each variant its outcome."""
+
+    def __init__(self, pools: Dict[str, ContextPool], siblings: bool = True):
+        """
+        Initialize the scheduler.
+
+        Args:
+            pools: Context pools keyed by marketplace code
+            siblings: Start the variants still to come together with the first one; off on
+                distributed workers, which run only the variants handed to them
+        """
+        self.pools = pools
+        self.siblings = siblings
+        self._outcomes: Dict[Tuple[tuple, str], asyncio.Future] = {}
+        self._order: Optional[Dict[pytest.Item, int]] = None
+        self._variants: Dict[tuple, List[Tuple[int, str]]] = {}
+
+    @staticmethod
+    def variant_key(item: pytest.Item) -> tuple:
+        """Key shared by the marketplace variants of a test, including its other parameters."""
+        params = getattr(item, "callspec", None)
+        other = sorted((name, repr(value)) for name, value in (params.params.items() if params else ())
+                       if name != "marketplaces")
+        return item.parent.nodeid, item.originalname, tuple(other)
+
+    def _later_variants(self, item: pytest.Item) -> List[str]:
+        """Marketplace codes of the variants of a test that run after this one."""
+        if self._order is None:
+            self._order = {}
+            for index, other in enumerate(item.session.items):
+                self._order[other] = index
+                code = getattr(getattr(other, "callspec", None), "params", {}).get("marketplaces")
+                if code is not None:
+                    self._variants.setdefault(self.variant_key(other), []).append((index, code))
+        position = self._order.get(item, -1)
+        return [code for index, code in self._variants.get(self.variant_key(item), []) if index > position]
+
+    async def _run_body(self, code: str, body: Callable[..., Awaitable[None]]) -> None:
+        pool = self.pools[code]
+        context = await pool.acquire()
+        try:
+            page = await context.new_page()
+            await body(page, pool.marketplace)
+        finally:
+            await pool.release(context)
+
+    async def run(self, item: pytest.Item, code: str, body: Callable[..., Awaitable[None]]) -> None:
+        """
+        Run the body for a test's marketplace, starting its later variants alongside.
+
+        The variant that runs first starts the body for every selected marketplace of the
+        test; the later variants then only wait for their own marketplace's outcome.
+
+        Args:
+            item: Test item of the variant
+            code: Marketplace of the variant
+            body: Coroutine function taking (page, marketplace)
+
+        Raises:
+            Exception: Whatever the body raised on this marketplace
+        """
+        key = self.variant_key(item)
+        if (key, code) not in self._outcomes:
+            codes = [code] + (self._later_variants(item) if self.siblings else [])
+            for sibling in codes:
+                if (key, sibling) not in self._outcomes:
+                    self._outcomes[key, sibling] = asyncio.ensure_future(self._run_body(sibling, body))
+        try:
+            await asyncio.shield(self._outcomes[key, code])
+        finally:
+            # A rerun of the same variant runs the body again
+            self._outcomes.pop((key, code), None)
+
+    async def close(self) -> None:
+        """Stop bodies started for variants that never ran, e.g. after --exitfirst."""
+        pending = list(self._outcomes.values())
+        self._outcomes.clear()
+        for outcome in pending:
+            outcome.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+class MarketplaceRunner:
+    """Runs a test body against the marketplace of the current test."""
+
+    def __init__(self, scheduler: MarketplaceScheduler, item: pytest.Item, code: str):
+        """
+        Initialize the runner.
+
+        Args:
+            scheduler: Session scheduler running the marketplace variants of tests
+            item: Test item of the current variant
+            code: Marketplace of the current variant
+        """
+        self.scheduler = scheduler
+        self.item = item
+        self.code = code
+
+    @property
+    def marketplace(self) -> Marketplace:
+        """Marketplace the body will run against."""
+        return self.scheduler.pools[self.code].marketplace
+
+    async def run(self, body: Callable[..., Awaitable[None]]) -> None:
+        """
+        Run the body on a pooled context of the marketplace.
+
+        The body should use only its page and marketplace arguments, because the first
+        variant of a test also runs it for the other marketplaces.
+
+        Args:
+            body: Coroutine function taking (page, marketplace)
+        """
+        await self.scheduler.run(self.item, self.code, body)
+
+
+def selected_marketplace_codes(config, marker, available: Sequence[str]) -> List[str]:
+    """
+    Resolve which marketplaces a test runs against.
+
+    The marketplaces marker lists what a test supports and --marketplaces limits the run;
+    when both are given their intersection is used.
+
+    Args:
+        config: Pytest config object
+        marker: The test's marketplaces marker, or None
+        available: Codes defined in the config
+
+    Returns:
+        Marketplace codes in config order
+    """
+    codes = list(available)
+    if marker is not None and marker.args:
+        codes = [code for code in codes if code in marker.args]
+    option = config.getoption("--marketplaces")
+    if option:
+        requested = [code.strip() for code in option.split(",") if code.strip()]
+        unknown = set(requested) - set(available)
+        if unknown:
+            raise pytest.UsageError(f"Unknown marketplaces: {', '.join(sorted(unknown))}")
+        codes = [code for code in codes if code in requested]
+    return codes
+
+
+def pytest_generate_tests(metafunc):
+    """Parametrize tests using the marketplaces fixture by marketplace code."""
+    if "marketplaces" not in metafunc.fixturenames:
+        return
+    available = load_marketplaces(metafunc.config.getoption("--marketplace-config"))
+    codes = selected_marketplace_codes(
+        metafunc.config, metafunc.definition.get_closest_marker("marketplaces"), list(available)
+    )
+    if codes:
+        metafunc.parametrize("marketplaces", codes, indirect=True, ids=codes)
+
+
+def pytest_addoption(parser):
+    """Register marketplace command line options."""
+    group = parser.getgroup("marketplaces", "multi-marketplace runs")
+    group.addoption(
+        "--marketplaces",
+        default=None,
+        help="Comma separated marketplace codes to run against (default: all configured)",
+    )
+    group.addoption(
+        "--marketplace-config",
+        default=DEFAULT_CONFIG_PATH,
+        help="Path to the marketplaces JSON config",
+    )
+    group.addoption(
+        "--marketplace-pool-size",
+        type=int,
+        default=DEFAULT_POOL_SIZE,
+        help="Browser contexts kept per marketplace (default: 1)",
+    )
+
+
+@pytest.fixture(scope="session")
+def marketplace_config(request) -> Dict[str, Marketplace]:
+    """Marketplaces loaded from the config file."""
+    return load_marketplaces(request.config.getoption("--marketplace-config"))
+
+
+@pytest.fixture(scope="session")
+async def marketplace_scheduler(browser_manager, marketplace_config, asset_cache, request) -> MarketplaceScheduler:
+    """One context pool per configured marketplace, and the scheduler running tests on them."""
+    size = request.config.getoption("--marketplace-pool-size")
+    pools = {
+        code: ContextPool(browser_manager, marketplace, size, asset_cache)
+        for code, marketplace in marketplace_config.items()
+    }
+    for pool in pools.values():
+        # Pooled contexts belong to the old browser once the watchdog relaunches it
+        browser_manager.on_recycle(pool.close)
+    scheduler = MarketplaceScheduler(pools, siblings=not request.config.getoption("--dist-worker", None))
+    yield scheduler
+    await scheduler.close()
+    for pool in pools.values():
+        await pool.close()
+
+
+@pytest.fixture
+def marketplaces(request, marketplace_scheduler, browser) -> MarketplaceRunner:
+    """Runner executing the test body on the marketplace the test is parametrized with."""
+    code = getattr(request, "param", None)
+    if code is None:
+        pytest.skip("No selected marketplace is supported by this test")
+    return MarketplaceRunner(marketplace_scheduler, request.node, code)
@@ -0,0 +1,617 @@
+"""
+Network Analyzer
+This module records every request made by test pages through the Chrome DevTools Protocol,
+with timing phases, transfer size, initiator and cache status. Requests are streamed to a
+newline-delimited JSON waterfall as they finish, while the run keeps only bounded
+aggregates per domain and resource type plus the critical path of the slowest navigations.
+"""
+
+import asyncio
+import heapq
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import pytest
+
+from utils.stream_reporter import get_stream_reporter
+
+
+DEFAULT_FIRST_PARTY = "amazon.com,amazon.in,media-amazon.com,ssl-images-amazon.com,images-amazon.com"
+
+MAX_IN_FLIGHT = 2000
+MAX_NAVIGATION_REQUESTS = 3000
+MAX_DOMAINS = 500
+MAX_URL_CHARS = 500
+SLOWEST_NAVIGATIONS = 5
+TOP_ROWS = 10
+
+OTHER_DOMAINS = "(other domains)"
+
+
+def host_of(url: str) -> str:
+    """
+    Get the host name of a URL.
+
+    Args:
+        url: Request URL
+
+    Returns:
+        Lower-case host, or an empty string for URLs without one
+    """
+    return (urlsplit(url).hostname or "").lower()
+
+
+def is_first_party(host: str, first_party: Tuple[str, ...]) -> bool:
+    """
+    Check whether a host belongs to one of the first-party domains.
+
+    Args:
+        host: Host name of the request
+        first_party: First-party domain suffixes
+
+    Returns:
+        True if the host is a first-party domain or one of its subdomains
+    """
+    return any(host == domain or host.endswith("." + domain) for domain in first_party)
+
+
+def initiator_url(initiator: dict) -> str:
+    """
+    Find the URL of the resource that started a request.
+
+    Args:
+        initiator: Initiator object of Network.requestWillBeSent
+
+    Returns:
+        Document, stylesheet or script URL, or an empty string if unknown
+    """
+    if initiator.get("url"):
+        return initiator["url"]
+    stack = initiator.get("stack")
+    while stack:
+        for frame in stack.get("callFrames", []):
+            if frame.get("url"):
+                return frame["url"]
+        stack = stack.get("parent")
+    return ""
+
+
+def cache_status(response: dict, from_memory: bool) -> str:
+    """
+    Classify where a response came from.
+
+    Args:
+        response: Response object of Network.responseReceived
+        from_memory: Whether Network.requestServedFromCache was seen
+
+    Returns:
+        One of memory, disk, prefetch, service-worker, revalidated or network
+    """
+    if from_memory:
+        return "memory"
+    if response.get("fromDiskCache"):
+        return "disk"
+    if response.get("fromPrefetchCache"):
+        return "prefetch"
+    if response.get("fromServiceWorker"):
+        return "service-worker"
+    if response.get("status") == 304:
+        return "revalidated"
+    return "network"
+
+
+def timing_phases(start: float, timing: Optional[dict], end: float) -> Dict[str, float]:
+    """
+    Split a request's duration into phases, as in a HAR file.
+
+    Connect includes the TLS handshake, which is also reported separately as ssl.
+
+    Args:
+        start: Monotonic time the request was issued, in seconds
+        timing: ResourceTiming object of the response, if any
+        end: Monotonic time the request finished, in seconds
+
+    Returns:
+        Phase durations in milliseconds
+    """
+    if not timing:
+        return {"queued": round((end - start) * 1000, 1)}
+
+    def span(begin_key: str, end_key: str) -> float:
+        begin, finish = timing.get(begin_key, -1), timing.get(end_key, -1)
+        return round(finish - begin, 1) if begin >= 0 and finish >= 0 else 0.0
+
+    base = timing["requestTime"]
+    offsets = [timing[key] for key in ("dnsStart", "connectStart", "sendStart") if timing.get(key, -1) >= 0]
+    headers_end = base * 1000 + timing.get("receiveHeadersEnd", 0)
+    return {
+        "queued": round(max((base - start) * 1000 + (min(offsets) if offsets else 0), 0), 1),
+        "dns": span("dnsStart", "dnsEnd"),
+        "connect": span("connectStart", "connectEnd"),
+        "ssl": span("sslStart", "sslEnd"),
+        "send": span("sendStart", "sendEnd"),
+        "wait": round(max(timing.get("receiveHeadersEnd", 0) - timing.get("sendEnd", 0), 0), 1),
+        "receive": round(max(end * 1000 - headers_end, 0), 1),
+    }
+
+
+@dataclass
+class ResourceStats:
+    """Running totals for one domain or resource type."""
+
+    requests: int = 0
+    failed: int = 0
+    cached: int = 0
+    transfer_bytes: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+    def add(self, entry: dict) -> None:
+        """
+        Add a finished request.
+
+        Args:
+            entry: Waterfall record of the request
+        """
+        self.requests += 1
+        self.failed += entry["failed"] is not None
+        self.cached += entry["cache"] != "network"
+        self.transfer_bytes += entry["transfer_bytes"]
+        self.total_ms += entry["duration_ms"]
+        self.max_ms = max(self.max_ms, entry["duration_ms"])
+
+
+class Navigation:
+    """Requests of one main-frame navigation, kept until its critical path is computed."""
+
+    def __init__(self, nodeid: str, url: str, loader_id: str, start: float):
+        """
+        Initialize the navigation.
+
+        Args:
+            nodeid: Test that navigated
+            url: URL of the main document
+            loader_id: CDP loader id of the navigation
+            start: Monotonic start time in seconds
+        """
+        self.nodeid = nodeid
+        self.url = url
+        self.loader_id = loader_id
+        self.start = start
+        self.end = start
+        self.requests = 0
+        self.transfer_bytes = 0
+        self.truncated = False
+        # request id -> (url, type, start, end, parent request id)
+        self._nodes: Dict[str, Tuple[str, str, float, float, Optional[str]]] = {}
+        self._by_url: Dict[str, str] = {}
+
+    def add(self, request_id: str, entry: dict, start: float, end: float, parent_url: str) -> None:
+        """
+        Add a finished request to the navigation's request tree.
+
+        Args:
+            request_id: CDP request id
+            entry: Waterfall record of the request
+            start: Monotonic start time in seconds
+            end: Monotonic end time in seconds
+            parent_url: URL of the initiating resource
+        """
+        self.requests += 1
+        self.transfer_bytes += entry["transfer_bytes"]
+        self.end = max(self.end, end)
+        if len(self._nodes) >= MAX_NAVIGATION_REQUESTS:
+            self.truncated = True
+            return
+        # Redirect hops reuse the request id, so each hop gets its own key
+        key = request_id if request_id not in self._nodes else f"{request_id}:{len(self._nodes)}"
+        self._nodes[key] = (entry["url"], entry["type"], start, end, self._by_url.get(parent_url))
+        self._by_url[entry["url"]] = key
+
+    def critical_path(self) -> List[dict]:
+        """
+        Follow initiators back from the request that finished last.
+
+        Returns:
+            Requests from the document to the last one, with offsets from the navigation start
+        """
+        if not self._nodes:
+            return []
+        key = max(self._nodes, key=lambda node: self._nodes[node][3])
+        path = []
+        seen = set()
+        while key is not None and key not in seen:
+            seen.add(key)
+            url, resource_type, start, end, parent = self._nodes[key]
+            path.append({
+                "url": url,
+                "type": resource_type,
+                "start_ms": round((start - self.start) * 1000, 1),
+                "end_ms": round((end - self.start) * 1000, 1),
+            })
+            key = parent
+        return list(reversed(path))
+
+    def summary(self) -> dict:
+        """Waterfall record describing the navigation."""
+        return {
+            "event": "navigation",
+            "nodeid": self.nodeid,
+            "url": self.url,
+            "duration_ms": round((self.end - self.start) * 1000, 1),
+            "requests": self.requests,
+            "transfer_bytes": self.transfer_bytes,
+            "truncated": self.truncated,
+            "critical_path": self.critical_path(),
+        }
+
+
+class PageRecorder:
+    """Collects the network events of one page from its CDP session."""
+
+    def __init__(self, analyzer: "NetworkAnalyzer", nodeid: str):
+        """
+        Initialize the recorder.
+
+        Args:
+            analyzer: Analyzer receiving finished requests and navigations
+            nodeid: Test owning the page
+        """
+        self.analyzer = analyzer
+        self.nodeid = nodeid
+        self.main_frame_id = None
+        self.navigation: Optional[Navigation] = None
+        self.closed = False
+        self._in_flight: Dict[str, dict] = {}
+
+    async def start(self, context, page) -> None:
+        """
+        Open a CDP session on the page and start listening.
+
+        Args:
+            context: Playwright BrowserContext owning the page
+            page: Playwright Page object
+        """
+        session = await context.new_cdp_session(page)
+        session.on("Network.requestWillBeSent", self._on_request)
+        session.on("Network.requestServedFromCache", self._on_served_from_cache)
+        session.on("Network.responseReceived", self._on_response)
+        session.on("Network.loadingFinished", self._on_finished)
+        session.on("Network.loadingFailed", self._on_failed)
+        frame_tree = await session.send("Page.getFrameTree")
+        self.main_frame_id = frame_tree["frameTree"]["frame"]["id"]
+        await session.send("Network.enable")
+        page.on("close", lambda _: self.close())
+
+    def _on_request(self, params: dict) -> None:
+        request_id = params["requestId"]
+        request = params["request"]
+        if request["url"].startswith("data:"):
+            return
+        if "redirectResponse" in params and request_id in self._in_flight:
+            # The previous hop of a redirect ends where the next one starts
+            pending = self._in_flight.pop(request_id)
+            pending["response"] = params["redirectResponse"]
+            self._finish(request_id, pending, params["timestamp"], params["redirectResponse"].get("encodedDataLength", 0))
+
+        if (params.get("type") == "Document" and params.get("frameId") == self.main_frame_id
+                and params.get("loaderId") == request_id
+                and (self.navigation is None or self.navigation.loader_id != request_id)):
+            self._end_navigation()
+            self.navigation = Navigation(self.nodeid, request["url"], request_id, params["timestamp"])
+
+        if len(self._in_flight) >= MAX_IN_FLIGHT:
+            self.analyzer.dropped += 1
+            return
+        self._in_flight[request_id] = {
+            "url": request["url"],
+            "method": request.get("method", "GET"),
+            "type": params.get("type", "Other"),
+            "initiator": params.get("initiator", {}),
+            "start": params["timestamp"],
+            "wall_time": params.get("wallTime", time.time()),
+            "from_memory": False,
+            "response": None,
+            "navigation": self.navigation,
+        }
+
+    def _on_served_from_cache(self, params: dict) -> None:
+        pending = self._in_flight.get(params["requestId"])
+        if pending is not None:
+            pending["from_memory"] = True
+
+    def _on_response(self, params: dict) -> None:
+        pending = self._in_flight.get(params["requestId"])
+        if pending is not None:
+            pending["response"] = params["response"]
+
+    def _on_finished(self, params: dict) -> None:
+        pending = self._in_flight.pop(params["requestId"], None)
+        if pending is not None:
+            self._finish(params["requestId"], pending, params["timestamp"], params.get("encodedDataLength", 0))
+
+    def _on_failed(self, params: dict) -> None:
+        pending = self._in_flight.pop(params["requestId"], None)
+        if pending is not None:
+            error = "canceled" if params.get("canceled") else params.get("errorText", "failed")
+            self._finish(params["requestId"], pending, params["timestamp"], 0, error)
+
+    def _finish(self, request_id: str, pending: dict, end: float, transfer_bytes: float,
+                error: Optional[str] = None) -> None:
+        response = pending["response"] or {}
+        host = host_of(pending["url"])
+        initiator = pending["initiator"]
+        parent_url = initiator_url(initiator)
+        navigation = pending["navigation"]
+        entry = {
+            "event": "request",
+            "nodeid": self.nodeid,
+            "navigation": navigation.url[:MAX_URL_CHARS] if navigation else None,
+            "url": pending["url"][:MAX_URL_CHARS],
+            "method": pending["method"],
+            "type": pending["type"],
+            "domain": host,
+            "third_party": not is_first_party(host, self.analyzer.first_party),
+            "status": response.get("status"),
+            "mime_type": response.get("mimeType"),
+            "protocol": response.get("protocol"),
+            "initiator_type": initiator.get("type"),
+            "initiator_url": parent_url[:MAX_URL_CHARS],
+            "cache": cache_status(response, pending["from_memory"]),
+            "transfer_bytes": int(transfer_bytes),
+            "wall_time": pending["wall_time"],
+            "offset_ms": round((pending["start"] - navigation.start) * 1000, 1) if navigation else None,
+            "duration_ms": round((end - pending["start"]) * 1000, 1),
+            "phases": timing_phases(pending["start"], response.get("timing"), end),
+            "failed": error,
+        }
+        self.analyzer.record_request(entry)
+        # Requests finishing after the next navigation started only go to the waterfall
+        if navigation is not None and navigation is self.navigation:
+            navigation.add(request_id, entry, pending["start"], end, parent_url[:MAX_URL_CHARS])
+
+    def _end_navigation(self) -> None:
+        if self.navigation is not None:
+            self.analyzer.record_navigation(self.navigation)
+            self.navigation = None
+
+    def close(self) -> None:
+        """Record requests still in flight as unfinished and close the current navigation."""
+        if self.closed:
+            return
+        self.closed = True
+        now = max((pending["start"] for pending in self._in_flight.values()), default=0.0)
+        for request_id, pending in list(self._in_flight.items()):
+            self._finish(request_id, pending, now, 0, "unfinished")
+        self._in_flight.clear()
+        self._end_navigation()
+        self.analyzer.recorders.discard(self)
+
+
+class NetworkAnalyzer:
+    """Pytest plugin aggregating the network activity of test pages."""
+
+    def __init__(self, config, output_path: Optional[str], first_party: Tuple[str, ...]):
+        """
+        Initialize the analyzer.
+
+        Args:
+            config: Pytest config object
+            output_path: Waterfall file path, or None when analysis is disabled
+            first_party: Domain suffixes not counted as third-party
+        """
+        self.config = config
+        self.enabled = bool(output_path)
+        self.output_path = output_path
+        self.first_party = first_party
+        self.by_domain: Dict[str, ResourceStats] = {}
+        self.by_type: Dict[str, ResourceStats] = {}
+        self.first_party_stats = ResourceStats()
+        self.third_party_stats = ResourceStats()
+        self.navigations = 0
+        self.dropped = 0
+        self.recorders = set()
+        self._slowest: List[Tuple[float, int, dict]] = []
+        self._pages: Dict[object, asyncio.Future] = {}
+        self.unavailable_reason: Optional[str] = None
+        self.failed_pages = 0
+        self.last_page_error: Optional[str] = None
+        self._sink = None
+
+    def attach(self, context, nodeid: str) -> None:
+        """
+        Record pages opened in a context, including popups.
+
+        Args:
+            context: Playwright BrowserContext object
+            nodeid: Test owning the context
+        """
+        if not self.enabled:
+            return
+
+        async def on_page(page):
+            await self.attach_page(context, page, nodeid)
+
+        context.on("page", on_page)
+
+    async def attach_page(self, context, page, nodeid: str) -> None:
+        """
+        Start recording a page; returns once its network events are being captured.
+
+        Args:
+            context: Playwright BrowserContext owning the page
+            page: Playwright Page object
+            nodeid: Test owning the page
+        """
+        if not self.enabled or self.unavailable_reason:
+            return
+        attaching = self._pages.get(page)
+        if attaching is None:
+            attaching = asyncio.ensure_future(self._start_recorder(context, page, nodeid))
+            self._pages[page] = attaching
+            page.on("close", lambda _: self._pages.pop(page, None))
+        await asyncio.shield(attaching)
+
+    async def _start_recorder(self, context, page, nodeid: str) -> None:
+        recorder = PageRecorder(self, nodeid)
+        try:
+            await recorder.start(context, page)
+        except Exception as error:
+            if page.is_closed():
+                return
+            browser = context.browser
+            if browser is not None and browser.browser_type.name != "chromium":
+                # CDP sessions exist only in Chromium; other browsers run unrecorded
+                self.unavailable_reason = str(error)
+            else:
+                # Only this page goes unrecorded, e.g. when its target crashed or detached
+                self.failed_pages += 1
+                self.last_page_error = str(error)
+            return
+        self.recorders.add(recorder)
+
+    def _write(self, record: dict) -> None:
+        if self._sink is None:
+            directory = os.path.dirname(self.output_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._sink = open(self.output_path, "w", encoding="utf-8")
+        self._sink.write(json.dumps(record, default=str) + "\n")
+
+    def record_request(self, entry: dict) -> None:
+        """
+        Write a finished request to the waterfall and add it to the aggregates.
+
+        Args:
+            entry: Waterfall record of the request
+        """
+        self._write(entry)
+        domain = entry["domain"]
+        if domain not in self.by_domain and len(self.by_domain) >= MAX_DOMAINS:
+            domain = OTHER_DOMAINS
+        self.by_domain.setdefault(domain, ResourceStats()).add(entry)
+        self.by_type.setdefault(entry["type"], ResourceStats()).add(entry)
+        (self.third_party_stats if entry["third_party"] else self.first_party_stats).add(entry)
+
+    def record_navigation(self, navigation: Navigation) -> None:
+        """
+        Write a completed navigation with its critical path.
+
+        Args:
+            navigation: Navigation whose requests have all finished
+        """
+        summary = navigation.summary()
+        self.navigations += 1
+        self._write(summary)
+        reporter = get_stream_reporter(self.config)
+        if reporter is not None:
+            reporter.emit({**summary, "event": "network_navigation"})
+        item = (summary["duration_ms"], self.navigations, summary)
+        if len(self._slowest) < SLOWEST_NAVIGATIONS:
+            heapq.heappush(self._slowest, item)
+        else:
+            heapq.heappushpop(self._slowest, item)
+
+    def summary(self) -> dict:
+        """Aggregates of the whole run."""
+        return {
+            "event": "summary",
+            "navigations": self.navigations,
+            "dropped_requests": self.dropped,
+            "first_party": vars(self.first_party_stats),
+            "third_party": vars(self.third_party_stats),
+            "by_domain": {domain: vars(stats) for domain, stats in self.by_domain.items()},
+            "by_type": {resource_type: vars(stats) for resource_type, stats in self.by_type.items()},
+        }
+
+    def pytest_sessionfinish(self, session):
+        if not self.enabled:
+            return
+        for recorder in list(self.recorders):
+            recorder.close()
+        if self._sink is not None:
+            self._write(self.summary())
+            self._sink.close()
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if not self.enabled:
+            return
+        terminalreporter.section("network analysis")
+        write = terminalreporter.write_line
+        total = ResourceStats()
+        for stats in (self.first_party_stats, self.third_party_stats):
+            for name in vars(total):
+                setattr(total, name, getattr(total, name) + getattr(stats, name))
+        if self.unavailable_reason:
+            write(f"Network analysis stopped: {self.unavailable_reason}")
+        if self.failed_pages:
+            write(f"{self.failed_pages} pages were not recorded, last error: {self.last_page_error}")
+        if not total.requests:
+            write("No requests recorded")
+            return
+        third = self.third_party_stats
+        write(f"{total.requests} requests in {self.navigations} navigations, "
+              f"{total.transfer_bytes / 1e6:.1f}MB transferred, {total.failed} failed, "
+              f"{total.cached / total.requests:.0%} served from cache")
+        write(f"Third-party: {third.requests} requests, {third.transfer_bytes / 1e6:.1f}MB, "
+              f"{third.total_ms / 1000:.1f}s of request time "
+              f"({third.total_ms / max(total.total_ms, 1):.0%} of all request time)")
+        if self.dropped:
+            write(f"{self.dropped} requests were not recorded (more than {MAX_IN_FLIGHT} in flight)")
+
+        for title, table in (("domain", self.by_domain), ("resource type", self.by_type)):
+            write("")
+            write(f"By {title} (requests / MB / total s / max ms / cached):")
+            ranked = sorted(table.items(), key=lambda kv: kv[1].total_ms, reverse=True)
+            for name, stats in ranked[:TOP_ROWS]:
+                write(f"  {name[:40]:<40} {stats.requests:6d} {stats.transfer_bytes / 1e6:7.2f} "
+                      f"{stats.total_ms / 1000:8.2f} {stats.max_ms:8.0f} {stats.cached:6d}")
+
+        write("")
+        write("Slowest navigations and their critical path:")
+        for duration, _, navigation in sorted(self._slowest, reverse=True):
+            write(f"  {duration / 1000:6.2f}s {navigation['url'][:90]} ({navigation['nodeid']})")
+            for step in navigation["critical_path"]:
+                write(f"    {step['start_ms']:8.0f}ms -> {step['end_ms']:8.0f}ms "
+                      f"{step['type']:<11} {step['url'][:80]}")
+        write(f"Waterfall written to {self.output_path}")
+
+
+def pytest_addoption(parser):
+    """Register network analyzer command line options."""
+    group = parser.getgroup("network", "network waterfall analysis")
+    group.addoption(
+        "--network-report",
+        nargs="?",
+        const="profile/network.ndjson",
+        default=None,
+        metavar="PATH",
+        help="Record every request of test pages and write the waterfall to PATH",
+    )
+    group.addoption(
+        "--network-first-party",
+        default=DEFAULT_FIRST_PARTY,
+        help="Comma separated domains not counted as third-party",
+    )
+
+
+def pytest_configure(config):
+    """Register the analyzer so pages can be attached and the summary is reported."""
+    output_path = config.getoption("--network-report")
+    worker = getattr(config, "workerinput", {}).get("workerid")
+    if output_path and worker:
+        output_path = f"{output_path}.{worker}"
+    first_party = tuple(
+        domain.strip().lower() for domain in config.getoption("--network-first-party").split(",") if domain.strip()
+    )
+    config.pluginmanager.register(NetworkAnalyzer(config, output_path, first_party), "network_analyzer")
+
+
+@pytest.fixture(scope="session")
+def network_analyzer(request) -> NetworkAnalyzer:
+    """The session's network analyzer."""
+    return request.config.pluginmanager.get_plugin("network_analyzer")
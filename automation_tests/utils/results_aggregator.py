@@ -0,0 +1,209 @@
+"""
+Results Aggregator
+This module builds JUnit XML and HTML reports from result streams written by
+utils/stream_reporter.py. Streams are read line by line, so it works on runs that are
+still in progress or crashed partway, with memory bounded by the number of running tests.
+
+Usage:
+    python -m utils.results_aggregator results.ndjson --junitxml junit.xml --html report.html
+"""
+
+import argparse
+import html
+import json
+import os
+import sys
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, TextIO, Tuple
+from xml.sax.saxutils import quoteattr, escape
+
+
+# A non-strict XPASS counts as a pass, as in pytest; a strict one is streamed as "failed"
+FAILED_OUTCOMES = {"failed"}
+
+
+def read_records(paths: Iterable[str]) -> Iterator[dict]:
+    """
+    Yield records from one or more result streams, skipping lines cut off by a crash.
+
+    Args:
+        paths: Paths of newline-delimited JSON files
+
+    Yields:
+        Decoded records
+    """
+    for path in paths:
+        with open(path, encoding="utf-8") as handle:
+            for line in handle:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+
+def iter_results(paths: List[str]) -> Iterator[dict]:
+    """
+    Yield one result per test, including tests that started but never reported.
+
+    Args:
+        paths: Paths of newline-delimited JSON files
+
+    Yields:
+        Test records
+    """
+    running: Dict[str, float] = {}
+    for record in read_records(paths):
+        event = record.get("event")
+        if event == "test_start":
+            running[record["nodeid"]] = record.get("time", 0.0)
+        elif event == "test":
+            running.pop(record["nodeid"], None)
+            yield record
+    for nodeid, start in running.items():
+        yield {
+            "event": "test",
+            "nodeid": nodeid,
+            "outcome": "error",
+            "duration": 0.0,
+            "start": start,
+            "phases": {},
+            "longrepr": "test started but no result was recorded (run crashed or is still running)",
+            "artifacts": [],
+        }
+
+
+def summarize(paths: List[str]) -> Tuple[Counter, float, bool]:
+    """
+    Count outcomes in a first pass over the streams.
+
+    Args:
+        paths: Paths of newline-delimited JSON files
+
+    Returns:
+        Tuple of outcome counts, total duration and whether the run finished
+    """
+    counts: Counter = Counter()
+    duration = 0.0
+    for result in iter_results(paths):
+        counts[result["outcome"]] += 1
+        duration += result.get("duration", 0.0)
+    finished = any(record.get("event") == "session_finish" for record in read_records(paths))
+    return counts, duration, finished
+
+
+def _split_nodeid(nodeid: str) -> Tuple[str, str]:
+    """Convert a node id to JUnit classname and name the way pytest does."""
+    parts = nodeid.split("::")
+    module = parts[0].replace("/", ".").replace("\\", ".")
+    if module.endswith(".py"):
+        module = module[:-3]
+    return ".".join([module] + parts[1:-1]), parts[-1]
+
+
+def write_junit(paths: List[str], output: TextIO) -> None:
+    """
+    Write a JUnit XML report.
+
+    Args:
+        paths: Paths of newline-delimited JSON files
+        output: Text stream receiving the XML
+    """
+    counts, duration, _ = summarize(paths)
+    failures = sum(counts[outcome] for outcome in FAILED_OUTCOMES)
+    skipped = counts["skipped"] + counts["xfailed"]
+    output.write('<?xml version="1.0" encoding="utf-8"?>\n<testsuites>\n')
+    output.write(
+        f'<testsuite name="pytest" errors="{counts["error"]}" failures="{failures}" '
+        f'skipped="{skipped}" tests="{sum(counts.values())}" time="{duration:.3f}">\n'
+    )
+    for result in iter_results(paths):
+        classname, name = _split_nodeid(result["nodeid"])
+        output.write(
+            f'<testcase classname={quoteattr(classname)} name={quoteattr(name)} '
+            f'time="{result.get("duration", 0.0):.3f}">'
+        )
+        outcome = result["outcome"]
+        message = result.get("longrepr") or ""
+        if outcome in FAILED_OUTCOMES:
+            output.write(f'<failure message={quoteattr(message.splitlines()[-1] if message else outcome)}>'
+                         f'{escape(message)}</failure>')
+        elif outcome == "error":
+            output.write(f'<error message={quoteattr(message.splitlines()[-1] if message else "error")}>'
+                         f'{escape(message)}</error>')
+        elif outcome in ("skipped", "xfailed"):
+            output.write(f'<skipped message={quoteattr(message or outcome)}/>')
+        if result.get("artifacts"):
+            attachments = "\n".join(f"[[ATTACHMENT|{path}]]" for path in result["artifacts"])
+            output.write(f"<system-out>{escape(attachments)}</system-out>")
+        output.write("</testcase>\n")
+    output.write("</testsuite>\n</testsuites>\n")
+
+
+def write_html(paths: List[str], output: TextIO) -> None:
+    """
+    Write a self-contained HTML report.
+
+    Args:
+        paths: Paths of newline-delimited JSON files
+        output: Text stream receiving the HTML
+    """
+    counts, duration, finished = summarize(paths)
+    status = "complete" if finished else "incomplete (still running or crashed)"
+    summary = ", ".join(f"{count} {outcome}" for outcome, count in sorted(counts.items()))
+    output.write(
+        "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>Test Results</title>\n"
+        "<style>body{font-family:sans-serif}table{border-collapse:collapse;width:100%}"
+        "td,th{border:1px solid #ccc;padding:4px;text-align:left;vertical-align:top}"
+        ".passed,.xpassed{background:#e6ffe6}.failed,.error{background:#ffe6e6}"
+        ".skipped,.xfailed{background:#fff8e1}pre{white-space:pre-wrap;margin:0}</style>\n"
+        "</head><body>\n"
+        f"<h1>Test Results</h1>\n<p>Run {html.escape(status)}: {html.escape(summary or 'no tests')} "
+        f"in {duration:.2f}s</p>\n"
+        "<table><tr><th>Test</th><th>Outcome</th><th>Duration</th><th>Phases</th><th>Details</th></tr>\n"
+    )
+    for result in iter_results(paths):
+        outcome = result["outcome"]
+        phases = ", ".join(f"{when} {phase['duration']:.2f}s"
+                           for when, phase in result.get("phases", {}).items())
+        details = ""
+        if result.get("longrepr"):
+            details += f"<details><summary>log</summary><pre>{html.escape(result['longrepr'])}</pre></details>"
+        for path in result.get("artifacts", []):
+            details += f'<div><a href="{html.escape(path)}">{html.escape(os.path.basename(path))}</a></div>'
+        output.write(
+            f'<tr class="{outcome}"><td>{html.escape(result["nodeid"])}</td><td>{outcome}</td>'
+            f'<td>{result.get("duration", 0.0):.2f}s</td><td>{phases}</td><td>{details}</td></tr>\n'
+        )
+    output.write("</table>\n</body></html>\n")
+
+
+def main(argv: List[str] = None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Build JUnit XML and HTML reports from result streams.")
+    parser.add_argument("streams", nargs="+", help="Newline-delimited JSON result files")
+    parser.add_argument("--junitxml", help="Path of the JUnit XML report to write")
+    parser.add_argument("--html", help="Path of the HTML report to write")
+    args = parser.parse_args(argv)
+
+    if not args.junitxml and not args.html:
+        counts, duration, finished = summarize(args.streams)
+        state = "finished" if finished else "incomplete"
+        print(f"{sum(counts.values())} tests ({state}) in {duration:.2f}s: "
+              + ", ".join(f"{count} {outcome}" for outcome, count in sorted(counts.items())))
+        return 0
+    for path, writer in ((args.junitxml, write_junit), (args.html, write_html)):
+        if not path:
+            continue
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as output:
+            writer(args.streams, output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,267 @@
+"""
+Snapshot Diffing
+This module holds the image work behind visual snapshots: PNG decoding, region masking,
+tile hashes with their on-disk sidecars, and the perceptual diff. It runs in the snapshot
+process pool and is imported on first use, so runs without visual tests skip NumPy and Pillow.
+"""
+
+import io
+import os
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+from PIL import Image
+
+from utils.visual_snapshot import (
+    DEFAULT_MAX_DIFF_RATIO,
+    DEFAULT_PIXEL_THRESHOLD,
+    DEFAULT_TILE_SIZE,
+    Region,
+)
+
+
+# Fixed per-pixel coefficients for the tile hash, generated once per process
+_HASH_SEED = 0x5EED
+_hash_coefficients: Dict[int, np.ndarray] = {}
+
+
+def _decode_png(data: bytes) -> np.ndarray:
+    """
+    Decode PNG bytes into an RGB array.
+
+    Args:
+        data: PNG encoded image
+
+    Returns:
+        Array of shape (height, width, 3) with dtype uint8
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        return np.asarray(image.convert("RGB"), dtype=np.uint8)
+
+
+def _apply_masks(pixels: np.ndarray, regions: Sequence[Region]) -> np.ndarray:
+    """
+    Build an ignore mask for the given regions and blank them in the image.
+
+    Args:
+        pixels: RGB image array, modified in place
+        regions: Regions as (x, y, width, height) in image coordinates
+
+    Returns:
+        Boolean array of shape (height, width), True where pixels are ignored
+    """
+    height, width = pixels.shape[:2]
+    ignored = np.zeros((height, width), dtype=bool)
+    for x, y, w, h in regions:
+        x0, y0 = max(int(x), 0), max(int(y), 0)
+        x1, y1 = min(int(x + w + 0.5), width), min(int(y + h + 0.5), height)
+        if x1 > x0 and y1 > y0:
+            ignored[y0:y1, x0:x1] = True
+    pixels[ignored] = 0
+    return ignored
+
+
+def _to_tiles(pixels: np.ndarray, tile_size: int) -> np.ndarray:
+    """
+    Split an image into square tiles, zero-padding the right and bottom edges.
+
+    Args:
+        pixels: Image array of shape (height, width) or (height, width, channels)
+        tile_size: Tile edge length in pixels
+
+    Returns:
+        Array of shape (tiles_y, tiles_x, tile_size, tile_size, ...)
+    """
+    height, width = pixels.shape[:2]
+    pad_y = -height % tile_size
+    pad_x = -width % tile_size
+    if pad_y or pad_x:
+        padding = [(0, pad_y), (0, pad_x)] + [(0, 0)] * (pixels.ndim - 2)
+        pixels = np.pad(pixels, padding)
+    tiles_y = pixels.shape[0] // tile_size
+    tiles_x = pixels.shape[1] // tile_size
+    tiles = pixels.reshape((tiles_y, tile_size, tiles_x, tile_size) + pixels.shape[2:])
+    return np.swapaxes(tiles, 1, 2)
+
+
+def tile_hashes(pixels: np.ndarray, tile_size: int = DEFAULT_TILE_SIZE) -> np.ndarray:
+    """
+    Compute a 64-bit hash for every tile of an RGB image in one vectorised pass.
+
+    Args:
+        pixels: RGB image array
+        tile_size: Tile edge length in pixels
+
+    Returns:
+        Array of shape (tiles_y, tiles_x) with dtype uint64
+    """
+    tiles = _to_tiles(pixels, tile_size)
+    tiles_y, tiles_x = tiles.shape[:2]
+    flat = tiles.reshape(tiles_y * tiles_x, -1).astype(np.uint64)
+    coefficients = _hash_coefficients.get(flat.shape[1])
+    if coefficients is None:
+        rng = np.random.default_rng(_HASH_SEED)
+        coefficients = rng.integers(1, 2**63, size=flat.shape[1], dtype=np.uint64) | np.uint64(1)
+        _hash_coefficients[flat.shape[1]] = coefficients
+    # Integer matmul wraps modulo 2**64, which is exactly what the hash wants
+    return (flat @ coefficients).reshape(tiles_y, tiles_x)
+
+
+def _luminance(pixels: np.ndarray) -> np.ndarray:
+    """Convert RGB pixels to perceptual luminance in the range 0-255."""
+    return pixels[..., 0] * 0.299 + pixels[..., 1] * 0.587 + pixels[..., 2] * 0.114
+
+
+def _sidecar_path(baseline_path: str) -> str:
+    """Path of the tile-hash sidecar stored next to a baseline image."""
+    return os.path.splitext(baseline_path)[0] + ".tiles.npz"
+
+
+def _load_sidecar(baseline_path: str, regions: Sequence[Region], tile_size: int) -> Optional[np.ndarray]:
+    """
+    Load cached baseline tile hashes if they were computed with the same masks.
+
+    Args:
+        baseline_path: Path to the baseline PNG
+        regions: Mask regions used for the current comparison
+        tile_size: Tile edge length in pixels
+
+    Returns:
+        Cached hashes, or None when the sidecar is missing or stale
+    """
+    path = _sidecar_path(baseline_path)
+    try:
+        if os.path.getmtime(path) < os.path.getmtime(baseline_path):
+            return None
+        with np.load(path) as sidecar:
+            if int(sidecar["tile_size"]) != tile_size:
+                return None
+            if not np.array_equal(sidecar["regions"], np.asarray(regions, dtype=np.float64).reshape(-1, 4)):
+                return None
+            return sidecar["hashes"]
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _save_sidecar(baseline_path: str, hashes: np.ndarray, regions: Sequence[Region], tile_size: int) -> None:
+    """Store baseline tile hashes so unchanged pages skip decoding the baseline."""
+    path = _sidecar_path(baseline_path)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as handle:
+        np.savez(
+            handle,
+            hashes=hashes,
+            regions=np.asarray(regions, dtype=np.float64).reshape(-1, 4),
+            tile_size=np.int64(tile_size),
+        )
+    os.replace(temp_path, path)
+
+
+def save_baseline(actual_png: bytes, baseline_path: str, regions: Sequence[Region] = (),
+                  tile_size: int = DEFAULT_TILE_SIZE) -> None:
+    """
+    Write a screenshot as the new baseline together with its tile-hash sidecar.
+
+    Args:
+        actual_png: PNG encoded screenshot
+        baseline_path: Destination path of the baseline PNG
+        regions: Mask regions of the screenshot
+        tile_size: Tile edge length in pixels
+    """
+    os.makedirs(os.path.dirname(baseline_path) or ".", exist_ok=True)
+    with open(baseline_path, "wb") as handle:
+        handle.write(actual_png)
+    pixels = _decode_png(actual_png).copy()
+    _apply_masks(pixels, regions)
+    _save_sidecar(baseline_path, tile_hashes(pixels, tile_size), regions, tile_size)
+
+
+def compare_images(actual_png: bytes, baseline_path: str, regions: Sequence[Region] = (),
+                   tile_size: int = DEFAULT_TILE_SIZE,
+                   pixel_threshold: float = DEFAULT_PIXEL_THRESHOLD,
+                   max_diff_ratio: float = DEFAULT_MAX_DIFF_RATIO,
+                   diff_path: Optional[str] = None) -> Dict[str, object]:
+    """
+    Compare a screenshot against a baseline image.
+
+    Tiles whose hashes match the baseline are skipped; only changed tiles get the
+    per-pixel luminance comparison. This function is picklable and runs in a worker
+    process.
+
+    Args:
+        actual_png: PNG encoded screenshot
+        baseline_path: Path to the baseline PNG
+        regions: Mask regions (x, y, width, height) ignored by the comparison
+        tile_size: Tile edge length in pixels
+        pixel_threshold: Luminance change (0-1) above which a pixel counts as different
+        max_diff_ratio: Fraction of compared pixels allowed to differ
+        diff_path: Where to write a highlighted diff image on mismatch
+
+    Returns:
+        Dictionary with match, diff_ratio, changed_tiles, total_tiles and reason
+    """
+    actual = _decode_png(actual_png).copy()
+    ignored = _apply_masks(actual, regions)
+    actual_hashes = tile_hashes(actual, tile_size)
+    result = {
+        "match": True,
+        "diff_ratio": 0.0,
+        "changed_tiles": 0,
+        "total_tiles": int(actual_hashes.size),
+        "reason": "",
+    }
+
+    baseline_hashes = _load_sidecar(baseline_path, regions, tile_size)
+    if baseline_hashes is not None and np.array_equal(baseline_hashes, actual_hashes):
+        return result
+
+    with open(baseline_path, "rb") as handle:
+        baseline = _decode_png(handle.read()).copy()
+    if baseline.shape != actual.shape:
+        result.update(match=False, diff_ratio=1.0, reason=(
+            f"size mismatch: baseline {baseline.shape[1]}x{baseline.shape[0]}, "
+            f"actual {actual.shape[1]}x{actual.shape[0]}"
+        ))
+        return result
+    baseline[ignored] = 0
+    if baseline_hashes is None:
+        baseline_hashes = tile_hashes(baseline, tile_size)
+        _save_sidecar(baseline_path, baseline_hashes, regions, tile_size)
+
+    changed = baseline_hashes != actual_hashes
+    result["changed_tiles"] = int(changed.sum())
+    if not result["changed_tiles"]:
+        return result
+
+    # Per-pixel comparison restricted to the tiles whose hashes differ
+    actual_tiles = _to_tiles(actual, tile_size)[changed].astype(np.float32)
+    baseline_tiles = _to_tiles(baseline, tile_size)[changed].astype(np.float32)
+    ignored_tiles = _to_tiles(ignored, tile_size)[changed]
+    delta = np.abs(_luminance(actual_tiles) - _luminance(baseline_tiles))
+    different = (delta > pixel_threshold * 255.0) & ~ignored_tiles
+
+    compared_pixels = max(int(actual.shape[0] * actual.shape[1] - ignored.sum()), 1)
+    result["diff_ratio"] = float(different.sum()) / compared_pixels
+    if result["diff_ratio"] > max_diff_ratio:
+        result["match"] = False
+        result["reason"] = (
+            f"{result['diff_ratio']:.2%} of pixels differ in {result['changed_tiles']} "
+            f"of {result['total_tiles']} tiles (allowed {max_diff_ratio:.2%})"
+        )
+        if diff_path:
+            _write_diff_image(actual, changed, different, tile_size, diff_path)
+    return result
+
+
+def _write_diff_image(actual: np.ndarray, changed: np.ndarray, different: np.ndarray,
+                      tile_size: int, diff_path: str) -> None:
+    """Write the screenshot dimmed, with differing pixels highlighted in red."""
+    height, width = actual.shape[:2]
+    highlight = np.zeros(changed.shape + (tile_size, tile_size), dtype=bool)
+    highlight[changed] = different
+    highlight = np.swapaxes(highlight, 1, 2).reshape(changed.shape[0] * tile_size, changed.shape[1] * tile_size)
+    highlight = highlight[:height, :width]
+    output = (actual // 3).astype(np.uint8)
+    output[highlight] = (255, 0, 0)
+    os.makedirs(os.path.dirname(diff_path) or ".", exist_ok=True)
+    Image.fromarray(output).save(diff_path)
@@ -0,0 +1,296 @@
+"""
+Startup Optimisation
+This module shortens the time to the first test. With --collection-cache the test files
+holding the selected tests are remembered per command line and file contents, so later
+runs import only those files. --startup-report breaks the time to the first test into phases.
+"""
+
+import fnmatch
+import hashlib
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+import pytest
+
+from utils.stream_reporter import get_stream_reporter
+
+
+CACHE_KEY_PREFIX = "startup/collection/"
+HASHED_SUFFIXES = (".py", ".ini", ".json", ".cfg", ".toml")
+SOURCE_DIRS = ("pages", "utils", "config")
+SOURCE_FILES = ("conftest.py", "pytest.ini", "setup.cfg", "tox.ini", "pyproject.toml")
+HEAVY_MODULES = ("playwright.async_api", "numpy", "PIL.Image", "psutil")
+
+
+def source_paths(rootdir: str, testpaths: List[str]) -> List[str]:
+    """
+    List the files whose contents decide what collection finds.
+
+    Only the test paths, the root conftest, the pages/, utils/ and config/ packages and
+    the ini files are included, so virtualenvs, reports and other outputs below the
+    rootdir neither slow the walk down nor invalidate the cache.
+
+    Args:
+        rootdir: Pytest rootdir
+        testpaths: Files and directories tests are collected from, relative to the rootdir
+
+    Returns:
+        Sorted absolute paths of the hashed files
+    """
+    paths = set()
+    for name in SOURCE_FILES:
+        path = os.path.join(rootdir, name)
+        if os.path.isfile(path):
+            paths.add(path)
+    for top in (*SOURCE_DIRS, *testpaths):
+        top = os.path.join(rootdir, top)
+        if os.path.isfile(top):
+            paths.add(top)
+        for directory, dirnames, filenames in os.walk(top):
+            dirnames[:] = [name for name in dirnames if not name.startswith(".") and name != "__pycache__"]
+            paths.update(os.path.join(directory, name) for name in filenames if name.endswith(HASHED_SUFFIXES))
+    return sorted(os.path.normpath(path) for path in paths)
+
+
+def source_fingerprint(rootdir: str, testpaths: List[str]) -> str:
+    """
+    Hash the contents of the test, fixture, page object and config files.
+
+    Args:
+        rootdir: Pytest rootdir
+        testpaths: Files and directories tests are collected from, relative to the rootdir
+
+    Returns:
+        Hex digest that changes whenever a test, fixture, plugin or setting changes
+    """
+    digest = hashlib.sha1()
+    for path in source_paths(rootdir, testpaths):
+        try:
+            with open(path, "rb") as handle:
+                content = handle.read()
+        except OSError:
+            continue
+        digest.update(os.path.relpath(path, rootdir).encode())
+        digest.update(hashlib.sha1(content).digest())
+    return digest.hexdigest()
+
+
+def process_age() -> float:
+    """
+    Measure how long ago the current process started.
+
+    On Linux this is read relative to the system uptime, which stays accurate when the
+    wall-clock boot time drifts, as it does on some CI virtual machines.
+
+    Returns:
+        Seconds since the process started
+    """
+    try:
+        with open("/proc/uptime", encoding="ascii") as handle:
+            uptime = float(handle.read().split()[0])
+        with open("/proc/self/stat", encoding="ascii") as handle:
+            start_ticks = int(handle.read().rsplit(")", 1)[1].split()[19])
+        return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        # Imported only where /proc is unavailable
+        import psutil
+
+        return time.time() - psutil.Process().create_time()
+
+
+def selection_key(config) -> str:
+    """
+    Build the cache key of the current test selection.
+
+    Args:
+        config: Pytest config object
+
+    Returns:
+        Key combining the command line, PYTEST_ADDOPTS and the source fingerprint
+    """
+    digest = hashlib.sha1()
+    for arg in config.invocation_params.args:
+        digest.update(arg.encode() + b"\0")
+    digest.update(os.environ.get("PYTEST_ADDOPTS", "").encode() + b"\0")
+    rootdir = str(config.rootpath)
+    testpaths = set(config.getini("testpaths"))
+    for arg in config.args:
+        path = os.path.relpath(os.path.abspath(arg.split("::")[0]), rootdir)
+        # Paths given on the command line count too, unless they are the whole rootdir
+        if path != "." and not path.startswith(".."):
+            testpaths.add(path)
+    digest.update(source_fingerprint(rootdir, sorted(testpaths)).encode())
+    return CACHE_KEY_PREFIX + digest.hexdigest()
+
+
+class CollectionCache:
+    """Skips importing test files that held no selected tests for the same key last time."""
+
+    def __init__(self, config):
+        """
+        Initialize the collection cache and look up the current selection.
+
+        Args:
+            config: Pytest config object
+        """
+        self.config = config
+        self.key = selection_key(config)
+        self.files: Optional[List[str]] = config.cache.get(self.key, None)
+        self.python_files = config.getini("python_files")
+        self.skipped = 0
+        self.collection_failed = False
+
+    @property
+    def hit(self) -> bool:
+        """Whether the selection was found in the cache."""
+        return self.files is not None
+
+    def pytest_ignore_collect(self, collection_path, config):
+        if self.files is None or collection_path.suffix != ".py":
+            return None
+        if not any(fnmatch.fnmatch(collection_path.name, pattern) for pattern in self.python_files):
+            return None
+        relative = collection_path.relative_to(config.rootpath).as_posix()
+        if relative in self.files:
+            return None
+        self.skipped += 1
+        return True
+
+    def pytest_collectreport(self, report):
+        if report.failed:
+            self.collection_failed = True
+
+    def pytest_collection_finish(self, session):
+        if self.hit or self.collection_failed:
+            return
+        rootpath = session.config.rootpath
+        files = sorted({item.path.relative_to(rootpath).as_posix() for item in session.items})
+        session.config.cache.set(self.key, files)
+
+
+class StartupReport:
+    """Measures where the time before the first test goes."""
+
+    def __init__(self, config, cache: Optional[CollectionCache]):
+        """
+        Initialize the startup report.
+
+        Args:
+            config: Pytest config object
+            cache: Active collection cache, if any
+        """
+        self.config = config
+        self.cache = cache
+        self.configured = time.time()
+        self.process_start = self.configured - process_age()
+        self.collection_start: Optional[float] = None
+        self.collection_finish: Optional[float] = None
+        self.first_setup_start: Optional[float] = None
+        self.first_setup_finish: Optional[float] = None
+        self.heavy_modules: List[str] = []
+        self.modules: Dict[str, float] = {}
+        self._module_started: Dict[str, float] = {}
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_collection(self, session):
+        self.collection_start = time.time()
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_collectstart(self, collector):
+        # Modules are imported from here on, some plugins do it while collection starts
+        if isinstance(collector, pytest.Module):
+            self._module_started[collector.nodeid] = time.perf_counter()
+
+    def pytest_collectreport(self, report):
+        started = self._module_started.pop(report.nodeid, None)
+        if started is not None:
+            self.modules[report.nodeid] = time.perf_counter() - started
+
+    def pytest_collection_finish(self, session):
+        self.collection_finish = time.time()
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_setup(self, item):
+        if self.first_setup_start is not None:
+            yield
+            return
+        self.first_setup_start = time.time()
+        self.heavy_modules = [name for name in HEAVY_MODULES if name in sys.modules]
+        yield
+        self.first_setup_finish = time.time()
+        reporter = get_stream_reporter(self.config)
+        if reporter is not None:
+            reporter.emit({"event": "startup", "nodeid": item.nodeid, **self.phases()})
+
+    def phases(self) -> Dict[str, float]:
+        """Phase durations in seconds, for the phases reached so far."""
+        phases = {"interpreter_and_plugins": self.configured - self.process_start}
+        if self.collection_start is not None and self.collection_finish is not None:
+            phases["before_collection"] = self.collection_start - self.configured
+            phases["collection"] = self.collection_finish - self.collection_start
+        if self.first_setup_start is not None and self.collection_finish is not None:
+            phases["before_first_setup"] = self.first_setup_start - self.collection_finish
+        if self.first_setup_finish is not None:
+            phases["first_test_setup"] = self.first_setup_finish - self.first_setup_start
+            phases["time_to_first_test"] = self.first_setup_finish - self.process_start
+        return phases
+
+    def pytest_terminal_summary(self, terminalreporter):
+        terminalreporter.section("startup")
+        write = terminalreporter.write_line
+        labels = {
+            "interpreter_and_plugins": "Interpreter, pytest, plugins and conftest",
+            "before_collection": "Session start",
+            "collection": "Collection",
+            "before_first_setup": "Between collection and first test",
+            "first_test_setup": "First test setup (session fixtures)",
+            "time_to_first_test": "Time to first test",
+        }
+        for name, duration in self.phases().items():
+            write(f"  {labels[name]:<44} {duration:7.3f}s")
+        if self.modules:
+            write("")
+            write("Slowest test modules to import and collect:")
+            for nodeid, duration in sorted(self.modules.items(), key=lambda kv: kv[1], reverse=True)[:5]:
+                write(f"  {nodeid:<44} {duration:7.3f}s")
+        if self.cache is not None:
+            state = f"hit, {self.cache.skipped} test files not imported" if self.cache.hit else "miss, selection stored"
+            write(f"Collection cache: {state}")
+        if self.first_setup_start is not None:
+            write(f"Loaded before the first test: {', '.join(self.heavy_modules) or 'none of ' + ', '.join(HEAVY_MODULES)}")
+
+
+def pytest_addoption(parser):
+    """Register startup command line options."""
+    group = parser.getgroup("startup", "startup optimisation")
+    group.addoption(
+        "--collection-cache",
+        action="store_true",
+        default=False,
+        help="Import only the test files that held selected tests in an earlier run with "
+             "the same arguments and unchanged files",
+    )
+    group.addoption(
+        "--startup-report",
+        action="store_true",
+        default=False,
+        help="Report where the time before the first test goes",
+    )
+
+
+def pytest_configure(config):
+    """Register the collection cache and startup report when requested."""
+    cache = None
+    # Selections that depend on git or last-failed state rather than on the files are not cached
+    dynamic_selection = (
+        config.getoption("--changed-only", None)
+        or config.getoption("lf", False)
+        or config.getoption("stepwise", False)
+    )
+    if config.getoption("--collection-cache") and getattr(config, "cache", None) is not None and not dynamic_selection:
+        cache = CollectionCache(config)
+        config.pluginmanager.register(cache, "collection_cache")
+    if config.getoption("--startup-report"):
+        config.pluginmanager.register(StartupReport(config, cache), "startup_report")
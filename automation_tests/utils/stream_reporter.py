@@ -0,0 +1,182 @@
+"""
+Streaming Results Reporter
+This module writes one newline-delimited JSON record per test outcome as soon as the
+test finishes, to a file or a local socket. Use utils/results_aggregator.py to build
+JUnit XML or HTML from the stream at any point of the run.
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+from typing import Dict, Optional, TextIO
+
+import pytest
+
+
+MAX_LONGREPR_CHARS = 20000
+
+stream_reporter_key = pytest.StashKey["StreamReporter"]()
+
+
+def open_sink(target: str) -> TextIO:
+    """
+    Open the destination of the result stream.
+
+    Args:
+        target: File path, tcp://host:port or unix:///path/to/socket
+
+    Returns:
+        Line-buffered text stream
+    """
+    if target.startswith("tcp://"):
+        host, _, port = target[len("tcp://"):].rpartition(":")
+        sock = socket.create_connection((host or "127.0.0.1", int(port)))
+        return sock.makefile("w", encoding="utf-8", buffering=1)
+    if target.startswith("unix://"):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(target[len("unix://"):])
+        return sock.makefile("w", encoding="utf-8", buffering=1)
+    directory = os.path.dirname(target)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return open(target, "w", encoding="utf-8", buffering=1)
+
+
+class StreamReporter:
+    """Pytest plugin streaming test outcomes as newline-delimited JSON."""
+
+    def __init__(self, sink: TextIO, fsync: bool = False):
+        """
+        Initialize the reporter.
+
+        Args:
+            sink: Text stream receiving one JSON record per line
+            fsync: Force every record to disk (file sinks only)
+        """
+        self.sink = sink
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        # Phases of tests that are still running; entries are dropped when teardown reports
+        self._pending: Dict[str, dict] = {}
+
+    def emit(self, record: dict) -> None:
+        """
+        Write a record to the stream immediately.
+
+        Args:
+            record: JSON serialisable record; an "event" key identifies its type
+        """
+        line = json.dumps(record, default=str)
+        with self._lock:
+            try:
+                self.sink.write(line + "\n")
+                self.sink.flush()
+                if self.fsync and hasattr(self.sink, "fileno"):
+                    os.fsync(self.sink.fileno())
+            except (OSError, ValueError):
+                # A closed socket must not fail the test run
+                pass
+
+    def close(self) -> None:
+        """Close the underlying stream."""
+        with self._lock:
+            try:
+                self.sink.close()
+            except OSError:
+                pass
+
+    def pytest_sessionstart(self, session):
+        self.emit({"event": "session_start", "time": time.time(), "pid": os.getpid(),
+                   "rootdir": str(session.config.rootpath)})
+
+    def pytest_runtest_logstart(self, nodeid, location):
+        self.emit({"event": "test_start", "nodeid": nodeid, "time": time.time()})
+
+    def pytest_runtest_logreport(self, report):
+        entry = self._pending.setdefault(report.nodeid, {
+            "event": "test",
+            "nodeid": report.nodeid,
+            "outcome": "passed",
+            "duration": 0.0,
+            "start": report.start,
+            "phases": {},
+            "longrepr": None,
+            "artifacts": [],
+        })
+        entry["phases"][report.when] = {"outcome": report.outcome, "duration": report.duration}
+        entry["duration"] += report.duration
+        entry["stop"] = report.stop
+        node = getattr(report, "node", None)
+        if node is not None:
+            entry["worker"] = getattr(node, "workerinput", {}).get("workerid")
+
+        if report.failed:
+            entry["outcome"] = "failed" if report.when == "call" else "error"
+            entry["longrepr"] = str(report.longrepr)[-MAX_LONGREPR_CHARS:]
+        elif report.skipped and entry["outcome"] == "passed":
+            if hasattr(report, "wasxfail"):
+                entry["outcome"] = "xfailed"
+            else:
+                entry["outcome"] = "skipped"
+                entry["longrepr"] = report.longrepr[2] if isinstance(report.longrepr, tuple) else str(report.longrepr)
+        elif report.when == "call" and hasattr(report, "wasxfail"):
+            entry["outcome"] = "xpassed"
+
+        if report.when == "teardown":
+            del self._pending[report.nodeid]
+            entry["artifacts"] = [value for key, value in report.user_properties if key == "artifact"]
+            self.emit(entry)
+
+    def pytest_sessionfinish(self, session, exitstatus):
+        for entry in self._pending.values():
+            entry["outcome"] = "error"
+            entry["longrepr"] = entry["longrepr"] or "test did not finish"
+            self.emit(entry)
+        self._pending.clear()
+        self.emit({"event": "session_finish", "time": time.time(), "exitstatus": int(exitstatus)})
+
+    def pytest_unconfigure(self, config):
+        self.close()
+
+
+def get_stream_reporter(config) -> Optional[StreamReporter]:
+    """
+    Return the active stream reporter so other plugins can emit their own records.
+
+    Args:
+        config: Pytest config object
+
+    Returns:
+        The reporter, or None when streaming is disabled
+    """
+    return config.stash.get(stream_reporter_key, None)
+
+
+def pytest_addoption(parser):
+    """Register streaming reporter command line options."""
+    group = parser.getgroup("stream", "streaming results reporter")
+    group.addoption(
+        "--stream-results",
+        default=None,
+        metavar="TARGET",
+        help="Stream one JSON record per test to a file, tcp://host:port or unix:///path",
+    )
+    group.addoption(
+        "--stream-fsync",
+        action="store_true",
+        default=False,
+        help="Force every streamed record to disk",
+    )
+
+
+def pytest_configure(config):
+    """Register the streaming reporter when a target is configured."""
+    target = config.getoption("--stream-results")
+    # Parallel workers forward their reports to the controller, which does the streaming
+    if not target or hasattr(config, "workerinput"):
+        return
+    reporter = StreamReporter(open_sink(target), fsync=config.getoption("--stream-fsync"))
+    config.stash[stream_reporter_key] = reporter
+    config.pluginmanager.register(reporter, "stream_reporter")
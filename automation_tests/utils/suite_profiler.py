@@ -0,0 +1,378 @@
+"""
+Suite Profiler
+This module measures where test suite time goes: fixture setup and teardown, event-loop
+lag and slow callbacks, and time spent inside Playwright calls versus Python overhead.
+Results are written as collapsed stacks that flamegraph.pl and speedscope can render.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import pytest
+
+
+MAX_LAG_SAMPLES = 10000
+
+
+class _Frame:
+    """One open frame of the profiling stack."""
+
+    __slots__ = ("name", "start", "child")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.start = time.perf_counter()
+        self.child = 0.0
+
+
+class _SlowCallbackHandler(logging.Handler):
+    """Captures asyncio's slow callback warnings emitted in debug mode."""
+
+    def __init__(self, profiler: "SuiteProfiler"):
+        super().__init__(logging.WARNING)
+        self.profiler = profiler
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if record.msg == "Executing %s took %.3f seconds" and len(record.args) == 2:
+            self.profiler.record_slow_callback(str(record.args[0]), float(record.args[1]))
+
+
+class LoopLagMonitor:
+    """Measures how late a periodic callback fires while the event loop is running."""
+
+    def __init__(self, interval: float):
+        """
+        Initialize the lag monitor.
+
+        Args:
+            interval: Seconds between heartbeats
+        """
+        self.interval = interval
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples: List[float] = []
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._expected = 0.0
+
+    def attach(self, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Wrap the loop's run_until_complete so heartbeats only run while the loop is busy.
+
+        Args:
+            loop: Event loop used by the test session
+        """
+        original = loop.run_until_complete
+
+        def run_until_complete(future):
+            self._arm(loop)
+            try:
+                return original(future)
+            finally:
+                self._disarm()
+
+        loop.run_until_complete = run_until_complete
+
+    def _arm(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._disarm()
+        self._expected = loop.time() + self.interval
+        self._handle = loop.call_at(self._expected, self._tick, loop)
+
+    def _disarm(self) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def _tick(self, loop: asyncio.AbstractEventLoop) -> None:
+        lag = max(loop.time() - self._expected, 0.0)
+        self.count += 1
+        self.total += lag
+        self.max = max(self.max, lag)
+        # Reservoir sampling keeps percentile estimates with bounded memory
+        if len(self.samples) < MAX_LAG_SAMPLES:
+            self.samples.append(lag)
+        else:
+            index = random.randrange(self.count)
+            if index < MAX_LAG_SAMPLES:
+                self.samples[index] = lag
+        self._expected = loop.time() + self.interval
+        self._handle = loop.call_at(self._expected, self._tick, loop)
+
+    def percentile(self, fraction: float) -> float:
+        """Return the given percentile (0-1) of sampled lag in seconds."""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+class SuiteProfiler:
+    """Pytest plugin collecting fixture, event-loop and Playwright timings."""
+
+    def __init__(self, output_path: str, slow_callback: float, lag_interval: float):
+        """
+        Initialize the profiler.
+
+        Args:
+            output_path: Destination of the collapsed stacks file
+            slow_callback: Callback duration in seconds reported as slow
+            lag_interval: Seconds between event-loop lag heartbeats
+        """
+        self.output_path = output_path
+        self.slow_callback = slow_callback
+        self.lag = LoopLagMonitor(lag_interval)
+        self.stacks: Dict[Tuple[str, ...], float] = defaultdict(float)
+        self.fixtures: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0.0, 0])
+        self.playwright_methods: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0])
+        self.slow_callbacks: List[Tuple[float, str, str]] = []
+        self.phase_totals: Dict[str, float] = defaultdict(float)
+        self._stack: List[_Frame] = []
+        self._loops = set()
+        self._in_flight = 0
+        self._busy_start = 0.0
+        self._busy_methods = set()
+        self._original_inner_send = None
+        self._log_handler = _SlowCallbackHandler(self)
+
+    # Stack bookkeeping
+
+    def _push(self, name: str) -> _Frame:
+        frame = _Frame(name)
+        self._stack.append(frame)
+        return frame
+
+    def _pop(self, frame: _Frame) -> float:
+        if frame not in self._stack:
+            return 0.0
+        while self._stack[-1] is not frame:
+            self._pop(self._stack[-1])
+        elapsed = time.perf_counter() - frame.start
+        path = tuple(f.name for f in self._stack)
+        self.stacks[path] += max(elapsed - frame.child, 0.0)
+        self._stack.pop()
+        if self._stack:
+            self._stack[-1].child += elapsed
+        return elapsed
+
+    def _record_leaf(self, name: str, elapsed: float) -> None:
+        path = tuple(f.name for f in self._stack) + (name,)
+        self.stacks[path] += elapsed
+        if self._stack:
+            self._stack[-1].child += elapsed
+
+    # Playwright instrumentation
+
+    def install_playwright_hook(self) -> None:
+        """Wrap Playwright's protocol channel so every driver call is timed."""
+        try:
+            from playwright._impl._connection import Channel
+        except ImportError:
+            return
+        original = Channel.inner_send
+        profiler = self
+
+        async def inner_send(channel, method, params, return_as_dict):
+            profiler._enter_playwright(method)
+            try:
+                return await original(channel, method, params, return_as_dict)
+            finally:
+                profiler._exit_playwright(method)
+
+        self._original_inner_send = original
+        Channel.inner_send = inner_send
+
+    def uninstall_playwright_hook(self) -> None:
+        """Restore Playwright's original protocol channel."""
+        if self._original_inner_send is not None:
+            from playwright._impl._connection import Channel
+            Channel.inner_send = self._original_inner_send
+            self._original_inner_send = None
+
+    def _enter_playwright(self, method: str) -> None:
+        if self._in_flight == 0:
+            self._busy_start = time.perf_counter()
+            self._busy_methods = set()
+        self._in_flight += 1
+        self._busy_methods.add(method)
+        self.playwright_methods[method][1] += 1
+
+    def _exit_playwright(self, method: str) -> None:
+        self._in_flight -= 1
+        if self._in_flight:
+            return
+        # Only the union of overlapping calls counts, so concurrent calls aren't double counted
+        elapsed = time.perf_counter() - self._busy_start
+        if len(self._busy_methods) == 1:
+            name = f"playwright:{method}"
+            self.playwright_methods[method][0] += elapsed
+        else:
+            name = "playwright:(concurrent)"
+            self.playwright_methods["(concurrent)"][0] += elapsed
+        self.phase_totals["playwright"] += elapsed
+        self._record_leaf(name, elapsed)
+
+    def record_slow_callback(self, description: str, duration: float) -> None:
+        """Record an asyncio callback that blocked the loop for too long."""
+        location = ";".join(f.name for f in self._stack) or "session"
+        self.slow_callbacks.append((duration, description, location))
+
+    def _attach_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+        if loop in self._loops:
+            return
+        self._loops.add(loop)
+        loop.set_debug(True)
+        loop.slow_callback_duration = self.slow_callback
+        self.lag.attach(loop)
+
+    # Pytest hooks
+
+    def pytest_configure(self, config):
+        self.install_playwright_hook()
+        logging.getLogger("asyncio").addHandler(self._log_handler)
+
+    def pytest_unconfigure(self, config):
+        self.uninstall_playwright_hook()
+        logging.getLogger("asyncio").removeHandler(self._log_handler)
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        frames = [self._push(part.replace(";", ",")) for part in item.nodeid.split("::")]
+        yield
+        self._pop(frames[0])
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_setup(self, item):
+        frame = self._push("setup")
+        yield
+        self.phase_totals["setup"] += self._pop(frame)
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_call(self, item):
+        frame = self._push("call")
+        yield
+        self.phase_totals["call"] += self._pop(frame)
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_teardown(self, item, nextitem):
+        frame = self._push("teardown")
+        yield
+        self.phase_totals["teardown"] += self._pop(frame)
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_fixture_setup(self, fixturedef, request):
+        name = f"fixture:{fixturedef.argname}"
+        stats = self.fixtures[fixturedef.argname]
+        teardown = {}
+
+        def end_teardown():
+            # Finalizers run last-in first-out, so this runs after the fixture's own teardown
+            frame = teardown.pop("frame", None)
+            if frame is not None:
+                stats[1] += self._pop(frame)
+
+        def start_teardown():
+            teardown["frame"] = self._push(name)
+
+        fixturedef.addfinalizer(end_teardown)
+        frame = self._push(name)
+        outcome = yield
+        stats[0] += self._pop(frame)
+        stats[2] += 1
+        fixturedef.addfinalizer(start_teardown)
+
+        result = outcome.get_result() if outcome.excinfo is None else None
+        if isinstance(result, asyncio.AbstractEventLoop):
+            self._attach_loop(result)
+
+    def pytest_sessionfinish(self, session):
+        self.write_collapsed_stacks()
+
+    def write_collapsed_stacks(self) -> None:
+        """Write the collected stacks in collapsed format, with microseconds as sample counts."""
+        directory = os.path.dirname(self.output_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.output_path, "w", encoding="utf-8") as handle:
+            for path, seconds in sorted(self.stacks.items()):
+                microseconds = int(seconds * 1_000_000)
+                if microseconds > 0:
+                    handle.write(f"{';'.join(path)} {microseconds}\n")
+
+    def pytest_terminal_summary(self, terminalreporter):
+        write = terminalreporter.write_line
+        terminalreporter.section("suite profile")
+
+        playwright = self.phase_totals["playwright"]
+        total = self.phase_totals["setup"] + self.phase_totals["call"] + self.phase_totals["teardown"]
+        fixture_total = sum(stats[0] + stats[1] for stats in self.fixtures.values())
+        write(f"Test time {total:.2f}s: setup {self.phase_totals['setup']:.2f}s, "
+              f"call {self.phase_totals['call']:.2f}s, teardown {self.phase_totals['teardown']:.2f}s")
+        write(f"Inside Playwright calls {playwright:.2f}s, fixtures {fixture_total:.2f}s, "
+              f"Python and waiting {max(total - playwright, 0.0):.2f}s")
+
+        write("")
+        write("Slowest fixtures (setup / teardown / setups):")
+        ranked = sorted(self.fixtures.items(), key=lambda kv: kv[1][0] + kv[1][1], reverse=True)
+        for argname, (setup, teardown, count) in ranked[:10]:
+            write(f"  {argname:<30} {setup:8.3f}s {teardown:8.3f}s {count:6d}")
+
+        write("")
+        write("Slowest Playwright methods (time / calls):")
+        ranked = sorted(self.playwright_methods.items(), key=lambda kv: kv[1][0], reverse=True)
+        for method, (elapsed, count) in ranked[:10]:
+            write(f"  {method:<30} {elapsed:8.3f}s {int(count):6d}")
+
+        write("")
+        write(f"Event-loop lag over {self.lag.count} heartbeats: "
+              f"mean {self.lag.total / max(self.lag.count, 1) * 1000:.1f}ms, "
+              f"p95 {self.lag.percentile(0.95) * 1000:.1f}ms, max {self.lag.max * 1000:.1f}ms")
+        write(f"Slow callbacks (> {self.slow_callback * 1000:.0f}ms): {len(self.slow_callbacks)}")
+        for duration, description, location in sorted(self.slow_callbacks, reverse=True)[:5]:
+            write(f"  {duration * 1000:8.1f}ms {description[:80]} in {location}")
+        write(f"Collapsed stacks written to {self.output_path}")
+
+
+def pytest_addoption(parser):
+    """Register suite profiler command line options."""
+    group = parser.getgroup("profile", "suite profiling")
+    group.addoption(
+        "--profile-suite",
+        nargs="?",
+        const="profile/suite.folded",
+        default=None,
+        metavar="PATH",
+        help="Profile fixtures, event-loop lag and Playwright calls and write collapsed stacks to PATH",
+    )
+    group.addoption(
+        "--profile-slow-callback-ms",
+        type=float,
+        default=100.0,
+        help="Report event-loop callbacks running longer than this (default: 100)",
+    )
+    group.addoption(
+        "--profile-lag-interval-ms",
+        type=float,
+        default=50.0,
+        help="Interval of the event-loop lag heartbeat (default: 50)",
+    )
+
+
+def pytest_configure(config):
+    """Register the profiler plugin when profiling is enabled."""
+    output_path = config.getoption("--profile-suite")
+    if not output_path:
+        return
+    worker = getattr(config, "workerinput", {}).get("workerid")
+    if worker:
+        output_path = f"{output_path}.{worker}"
+    profiler = SuiteProfiler(
+        output_path=output_path,
+        slow_callback=config.getoption("--profile-slow-callback-ms") / 1000.0,
+        lag_interval=config.getoption("--profile-lag-interval-ms") / 1000.0,
+    )
+    config.pluginmanager.register(profiler, "suite_profiler")
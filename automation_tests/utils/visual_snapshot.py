@@ -0,0 +1,170 @@
+"""
+Visual Snapshot Comparison
+This module stores page screenshots as on-disk baselines and compares new screenshots
+against them with a vectorised tile-hash and perceptual diff.
+"""
+
+import asyncio
+import os
+import sys
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+import pytest
+
+
+Region = Tuple[int, int, int, int]
+
+DEFAULT_TILE_SIZE = 32
+DEFAULT_PIXEL_THRESHOLD = 0.1
+DEFAULT_MAX_DIFF_RATIO = 0.01
+MASK_COLOR = "#FF00FF"
+
+# Collects the bounding boxes of every element matching a mask selector in page coordinates
+_MASK_REGIONS_JS = """
+(elements, fullPage) => elements.map(e => {
+    const r = e.getBoundingClientRect();
+    return fullPage ? [r.left + window.scrollX, r.top + window.scrollY, r.width, r.height]
+                    : [r.left, r.top, r.width, r.height];
+})
+"""
+
+
+class SnapshotAsserter:
+    """Takes page screenshots and compares them against stored baselines."""
+
+    def __init__(self, snapshot_dir: str, executor: ProcessPoolExecutor, update: bool = False,
+                 artifacts: Optional[List[Tuple[str, str]]] = None):
+        """
+        Initialize the snapshot asserter.
+
+        Args:
+            snapshot_dir: Directory holding the baselines for the current test module
+            executor: Process pool used for image comparisons
+            update: Overwrite baselines instead of comparing
+            artifacts: List receiving ("artifact", path) entries for failure images
+        """
+        self.snapshot_dir = snapshot_dir
+        self.executor = executor
+        self.update = update
+        self.artifacts = artifacts if artifacts is not None else []
+
+    async def _mask_regions(self, page, selectors: Sequence[str], full_page: bool) -> List[Region]:
+        """
+        Resolve mask selectors to regions in screenshot coordinates.
+
+        Full-page screenshots start at the top of the document, viewport screenshots at the
+        current scroll position, so regions are in page or viewport coordinates to match.
+        """
+        regions: List[Region] = []
+        for selector in selectors:
+            boxes = await page.locator(selector).evaluate_all(_MASK_REGIONS_JS, full_page)
+            regions.extend(tuple(box) for box in boxes if box[2] > 0 and box[3] > 0)
+        return regions
+
+    async def __call__(self, page, name: str, mask: Sequence[str] = (), full_page: bool = True,
+                       tile_size: int = DEFAULT_TILE_SIZE,
+                       pixel_threshold: float = DEFAULT_PIXEL_THRESHOLD,
+                       max_diff_ratio: float = DEFAULT_MAX_DIFF_RATIO) -> None:
+        """
+        Assert that the page matches its stored baseline.
+
+        A missing baseline is written from the current screenshot and the assertion passes.
+
+        Args:
+            page: Playwright Page object
+            name: Snapshot name, unique within the test module
+            mask: Selectors of dynamic regions such as prices and ads
+            full_page: Capture the full scrollable page
+            tile_size: Tile edge length in pixels
+            pixel_threshold: Luminance change (0-1) above which a pixel counts as different
+            max_diff_ratio: Fraction of compared pixels allowed to differ
+        """
+        baseline_path = os.path.join(self.snapshot_dir, f"{name}.png")
+        regions = await self._mask_regions(page, mask, full_page)
+        actual_png = await page.screenshot(
+            full_page=full_page,
+            # CSS pixels, the unit of the mask regions, also under device scale factors above 1
+            scale="css",
+            animations="disabled",
+            caret="hide",
+            mask=[page.locator(selector) for selector in mask],
+            mask_color=MASK_COLOR,
+        )
+        # Imported here so NumPy and Pillow load only in runs that compare snapshots
+        from utils.snapshot_diff import compare_images, save_baseline
+
+        loop = asyncio.get_running_loop()
+
+        if self.update or not os.path.exists(baseline_path):
+            if not self.update:
+                warnings.warn(f"Created missing snapshot baseline {baseline_path}")
+            await loop.run_in_executor(
+                self.executor, save_baseline, actual_png, baseline_path, regions, tile_size
+            )
+            return
+
+        diff_path = os.path.join(self.snapshot_dir, "failures", f"{name}.diff.png")
+        result = await loop.run_in_executor(
+            self.executor, compare_images, actual_png, baseline_path, regions,
+            tile_size, pixel_threshold, max_diff_ratio, diff_path,
+        )
+        if not result["match"]:
+            actual_path = os.path.join(self.snapshot_dir, "failures", f"{name}.actual.png")
+            os.makedirs(os.path.dirname(actual_path), exist_ok=True)
+            with open(actual_path, "wb") as handle:
+                handle.write(actual_png)
+            self.artifacts.append(("artifact", actual_path))
+            if os.path.exists(diff_path):
+                self.artifacts.append(("artifact", diff_path))
+            pytest.fail(f"Snapshot '{name}' does not match baseline: {result['reason']}", pytrace=False)
+
+
+def pytest_addoption(parser):
+    """Register visual snapshot command line options."""
+    group = parser.getgroup("visual", "visual snapshot comparison")
+    group.addoption(
+        "--update-snapshots",
+        action="store_true",
+        default=False,
+        help="Overwrite visual snapshot baselines with the current screenshots",
+    )
+    group.addoption(
+        "--snapshot-dir",
+        default=None,
+        help="Directory holding visual snapshot baselines (default: <rootdir>/snapshots)",
+    )
+    group.addoption(
+        "--snapshot-workers",
+        type=int,
+        default=None,
+        help="Number of processes used for snapshot comparisons",
+    )
+
+
+@pytest.fixture(scope="session")
+def snapshot_executor(request):
+    """Process pool that runs snapshot comparisons off the event loop."""
+    workers = request.config.getoption("--snapshot-workers") or min(4, os.cpu_count() or 1)
+    executor = ProcessPoolExecutor(max_workers=workers)
+    yield executor
+    executor.shutdown(wait=True, cancel_futures=True)
+
+
+@pytest.fixture
+def assert_snapshot(request, snapshot_executor, emulation_profile) -> SnapshotAsserter:
+    """Snapshot assertion bound to the baseline directory of the test module and profile."""
+    config = request.config
+    root = config.getoption("--snapshot-dir") or os.path.join(str(config.rootpath), "snapshots")
+    module = os.path.splitext(os.path.basename(str(request.node.path)))[0]
+    snapshot_dir = os.path.join(root, sys.platform, module)
+    if emulation_profile is not None:
+        # Emulated viewports and devices render differently, so each profile has its own baselines
+        snapshot_dir = os.path.join(snapshot_dir, emulation_profile.name)
+    return SnapshotAsserter(
+        snapshot_dir=snapshot_dir,
+        executor=snapshot_executor,
+        update=config.getoption("--update-snapshots"),
+        artifacts=request.node.user_properties,
+    )